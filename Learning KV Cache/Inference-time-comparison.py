@@ -2,6 +2,7 @@ import torch
 import torch.nn.functional as F
 import time
 import matplotlib.pyplot as plt
+from kv_cache import KVCache
 
 # Parameters
 d_model = 512     # Embedding dimension
@@ -16,16 +17,18 @@ W_v = torch.randn(d_model, d_model)
 # Store timings
 timings_no_cache = []
 timings_kv_cache = []
+timings_kv_cache_cat = []
 
-# Initialize KV cache
-K_cache = []
+# Initialize KV caches
+K_cache = []      # list + torch.cat baseline
 V_cache = []
+kv_cache = KVCache(max_len=t, d_model=d_model)  # preallocated, written in place
 
 # Simulate decoding without KV cache
 for step in range(1, t + 1):
     x_till_now = x[:step]
 
-    start = time.time()
+    start = time.perf_counter()
 
     # Full recomputation
     Q = x_till_now @ W_q
@@ -36,7 +39,7 @@ for step in range(1, t + 1):
     weights = torch.nn.functional.softmax(scores, dim=-1)
     output = weights @ V
 
-    end = time.time()
+    end = time.perf_counter()
     elapsed_ms = (end - start) * 1000  # milliseconds
     timings_no_cache.append(elapsed_ms)
 
@@ -44,7 +47,7 @@ for step in range(1, t + 1):
 for step in range(t):
     x_t = x[step : step + 1]  # (1, d_model)
 
-    start = time.time()
+    start = time.perf_counter()
 
     Q = x_t @ W_q             # (1, d_model)
     K_t = x_t @ W_k
@@ -60,13 +63,34 @@ for step in range(t):
     weights = F.softmax(scores, dim=-1)
     output = weights @ V_all                 # (1, d_model)
 
-    end = time.time()
+    end = time.perf_counter()
+    elapsed_ms = (end - start) * 1000
+    timings_kv_cache_cat.append(elapsed_ms)
+
+
+for step in range(t):
+    x_t = x[step : step + 1]  # (1, d_model)
+
+    start = time.perf_counter()
+
+    Q = x_t @ W_q             # (1, d_model)
+    K_t = x_t @ W_k
+    V_t = x_t @ W_v
+
+    K_all, V_all = kv_cache.append(K_t, V_t)  # views (step+1, d_model), no copy of old rows
+
+    scores = Q @ K_all.T / (d_model ** 0.5)   # (1, step+1)
+    weights = F.softmax(scores, dim=-1)
+    output = weights @ V_all                 # (1, d_model)
+
+    end = time.perf_counter()
     elapsed_ms = (end - start) * 1000
     timings_kv_cache.append(elapsed_ms)
 
 # Plotting
 plt.figure(figsize=(10, 5))
-plt.plot(range(1, t + 1), timings_kv_cache, label='With KV Cache', color='blue')
+plt.plot(range(1, t + 1), timings_kv_cache, label='With KV Cache (preallocated)', color='blue')
+plt.plot(range(1, t + 1), timings_kv_cache_cat, label='With KV Cache (torch.cat)', color='green')
 plt.plot(range(1, t + 1), timings_no_cache, label='No KV Cache', color='red')
 plt.xlabel('Decoding Step')
 plt.ylabel('Time (ms)')
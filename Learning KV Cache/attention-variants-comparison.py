@@ -0,0 +1,39 @@
+import importlib
+import statistics
+import time
+
+import torch
+
+from kv_cache import KVCache
+
+attention = importlib.import_module("self-attention")
+
+# Parameters
+d_model = 512     # Embedding dimension
+n_heads = 8       # Query heads for the multi-head variants
+t = 512           # Tokens decoded per variant
+torch.manual_seed(0)
+x = torch.randn(t, d_model)  # Random input sequence
+
+variants = {
+    "Single-head": attention.Attention(d_model),
+    "Multi-head (8 KV heads)": attention.MultiHeadAttention(d_model, n_heads),
+    "Grouped-query (2 KV heads)": attention.GroupedQueryAttention(d_model, n_heads, n_kv_heads=2),
+    "Multi-query (1 KV head)": attention.MultiQueryAttention(d_model, n_heads),
+}
+
+print(f"d_model={d_model}, n_heads={n_heads}, {t} decoding steps, float32 cache")
+print(f"{'Variant':28} {'KV bytes/token':>15} {'Cache @ t':>12} {'Median step':>12} {'p95 step':>10}")
+for name, attn in variants.items():
+    cache = KVCache(max_len=t, d_model=attn.kv_dim)
+    timings = []
+    with torch.no_grad():
+        for step in range(t):
+            start = time.perf_counter()
+            attn.forward_step(x[step : step + 1], cache)
+            timings.append((time.perf_counter() - start) * 1000)  # milliseconds
+
+    timings.sort()
+    median = statistics.median(timings)
+    p95 = timings[int(0.95 * (len(timings) - 1))]
+    print(f"{name:28} {attn.cache_bytes_per_token():>15} {cache.nbytes() / 1024:>10.0f}KB {median:>10.3f}ms {p95:>8.3f}ms")
@@ -0,0 +1,115 @@
+import importlib
+import time
+from collections import deque
+
+import torch
+import torch.nn.functional as F
+
+from kv_cache import BatchedKVCache
+
+# self-attention.py has a hyphen in its name, so it can't be imported with a plain import statement
+Attention = importlib.import_module("self-attention").Attention
+
+
+# Continuous-batching decoder: up to `batch_size` sequences are decoded together, one token
+# each per step. A finished sequence frees its slot and the next waiting request takes it over
+# on the following step, so the batch stays full instead of waiting for the slowest sequence.
+class BatchedDecoder:
+    def __init__(self, attn, batch_size, max_len, d_model):
+        self.attn = attn
+        self.d_model = d_model
+        self.cache = BatchedKVCache(batch_size, max_len, d_model)
+        self.slots = [None] * batch_size   # request running in each slot (None = free)
+        self.waiting = deque()             # requests not admitted yet
+        self.finished = {}                 # request_id -> (len, d_model) outputs
+
+    def submit(self, request_id, x):
+        # x: (len, d_model), the tokens of one sequence fed one by one
+        if x.size(0) == 0:
+            raise ValueError(f"Request {request_id!r} has no tokens")
+        if x.size(0) > self.cache.max_len:
+            raise ValueError(f"Request {request_id!r} has {x.size(0)} tokens, max_len is {self.cache.max_len}")
+        self.waiting.append({"id": request_id, "x": x, "pos": 0, "outputs": []})
+
+    def has_work(self):
+        return bool(self.waiting) or any(req is not None for req in self.slots)
+
+    def _admit(self):
+        for slot, req in enumerate(self.slots):
+            if req is None and self.waiting:
+                self.slots[slot] = self.waiting.popleft()
+                self.cache.reset(slot)
+
+    @torch.no_grad()
+    def step(self):
+        # Decode one token for every running sequence; returns how many tokens were decoded
+        self._admit()
+        active = [slot for slot, req in enumerate(self.slots) if req is not None]
+        if not active:
+            return 0
+
+        # Next input token of every slot, zeros for free slots: (B, 1, d_model)
+        x_t = torch.zeros(self.cache.batch_size, 1, self.d_model)
+        for slot in active:
+            req = self.slots[slot]
+            x_t[slot, 0] = req["x"][req["pos"]]
+
+        Q, K_t, V_t = self.attn.qkv(x_t)                       # (B, 1, d_model) each, one fused matmul
+        slots = torch.tensor(active)
+        self.cache.append(slots, K_t[slots, 0], V_t[slots, 0])  # only running slots grow
+
+        K, V, mask = self.cache.get()                          # (B, L, d_model), (B, L)
+        scores = torch.matmul(Q, K.transpose(-2, -1)) / self.d_model**0.5  # (B, 1, L)
+        # Padding keys get -inf; free slots keep key 0 visible so their (ignored) row isn't NaN
+        mask[:, 0] = True
+        scores = scores.masked_fill(~mask[:, None, :], float('-inf'))
+        weights = F.softmax(scores, dim=-1)                    # (B, 1, L)
+        output = torch.matmul(weights, V)                      # (B, 1, d_model)
+
+        for slot in active:
+            req = self.slots[slot]
+            req["outputs"].append(output[slot].clone())          # own copy, not a view pinning the whole batch
+            req["pos"] += 1
+            if req["pos"] == req["x"].size(0):
+                self.finished[req["id"]] = torch.cat(req["outputs"], dim=0)
+                self.slots[slot] = None
+        return len(active)
+
+    def run(self):
+        while self.has_work():
+            self.step()
+        return self.finished
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    d_model = 512
+    max_len = 256
+    num_requests = 64
+    attn = Attention(d_model)
+
+    # Requests of different lengths
+    lengths = torch.randint(32, max_len + 1, (num_requests,)).tolist()
+    requests = [torch.randn(n, d_model) for n in lengths]
+
+    # Sanity check: decoding token by token matches the full causal forward pass
+    decoder = BatchedDecoder(attn, batch_size=4, max_len=max_len, d_model=d_model)
+    for i, x in enumerate(requests[:8]):
+        decoder.submit(i, x)
+    outputs = decoder.run()
+    for i, x in enumerate(requests[:8]):
+        with torch.no_grad():
+            _, expected, _ = attn(x[None], mask=True, need_weights=False)
+        assert torch.allclose(outputs[i], expected[0], atol=1e-4), f"Mismatch for request {i}"
+
+    # Throughput for different batch sizes
+    total_tokens = sum(lengths)
+    print(f"Decoding {num_requests} requests ({total_tokens} tokens), d_model={d_model}")
+    for batch_size in [1, 2, 4, 8, 16, 32]:
+        decoder = BatchedDecoder(attn, batch_size=batch_size, max_len=max_len, d_model=d_model)
+        for i, x in enumerate(requests):
+            decoder.submit(i, x)
+        start = time.perf_counter()
+        decoder.run()
+        elapsed = time.perf_counter() - start
+        print(f"  batch_size={batch_size:3d}: {elapsed:7.3f}s  {total_tokens / elapsed:10.1f} tokens/sec")
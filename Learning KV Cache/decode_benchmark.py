@@ -0,0 +1,183 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import statistics
+import time
+
+import torch
+import torch.nn.functional as F
+
+from kv_cache import BatchedKVCache
+
+# Decode-latency benchmark. Sweeps d_model, sequence length, batch size, dtype and
+# torch.set_num_threads, times every decoding step with perf_counter_ns after warmup runs,
+# and writes median / p95 / p99 step latency to JSON and/or CSV. Plotting is a separate,
+# optional step (--plot) so the numbers can be produced in CI without matplotlib.
+# With --pin, each configuration also runs pinned to its first `threads` CPUs (Linux only,
+# os.sched_setaffinity), so the scheduler can't move the worker threads around mid-run.
+#
+#   python decode_benchmark.py --d-model 256 512 --seq-len 512 --batch-size 1 8 --pin --json results.json
+#   python decode_benchmark.py --plot results.json
+
+MODES = ["no_cache", "kv_cache", "kv_cache_cat"]
+
+
+def decode_steps(mode, x, W_q, W_k, W_v):
+    # One full decode over x: (B, t, d_model). Returns the latency of every step in ns.
+    B, t, d_model = x.shape
+    timings = []
+    if mode == "kv_cache":
+        cache = BatchedKVCache(B, t, d_model, dtype=x.dtype)
+        slots = torch.arange(B)
+    K_cache, V_cache = [], []
+
+    for step in range(t):
+        start = time.perf_counter_ns()
+        if mode == "no_cache":
+            x_till_now = x[:, : step + 1]                      # (B, step+1, d_model)
+            Q = x_till_now @ W_q                               # full recomputation
+            K_all = x_till_now @ W_k
+            V_all = x_till_now @ W_v
+        else:
+            x_t = x[:, step : step + 1]                        # (B, 1, d_model)
+            Q = x_t @ W_q
+            K_t = x_t @ W_k
+            V_t = x_t @ W_v
+            if mode == "kv_cache":
+                cache.append(slots, K_t[:, 0], V_t[:, 0])
+                K_all, V_all, _ = cache.get()                  # views (B, step+1, d_model)
+            else:
+                K_cache.append(K_t)
+                V_cache.append(V_t)
+                K_all = torch.cat(K_cache, dim=1)
+                V_all = torch.cat(V_cache, dim=1)
+        weights = F.softmax(Q @ K_all.transpose(-2, -1) / d_model**0.5, dim=-1)
+        # The attention output is part of every decode step, so it is timed; x is given rather
+        # than generated, so the result isn't needed afterwards and is discarded
+        weights @ V_all                                        # (B, 1 or step+1, d_model)
+        timings.append(time.perf_counter_ns() - start)
+    return timings
+
+
+def pin_cpus(threads):
+    # Restrict this process to its first `threads` allowed CPUs; returns the previous set to restore
+    allowed = sorted(os.sched_getaffinity(0))
+    if threads > len(allowed):
+        raise ValueError(f"--pin with threads={threads}, but only {len(allowed)} CPUs are available")
+    os.sched_setaffinity(0, allowed[:threads])
+    return allowed
+
+
+def run_config(mode, d_model, seq_len, batch_size, dtype, threads, warmup, trials):
+    torch.set_num_threads(threads)
+    torch.manual_seed(0)
+    dtype = getattr(torch, dtype)
+    x = torch.randn(batch_size, seq_len, d_model, dtype=dtype)
+    W_q, W_k, W_v = (torch.randn(d_model, d_model, dtype=dtype) / d_model**0.5 for _ in range(3))
+
+    with torch.no_grad():
+        for _ in range(warmup):
+            decode_steps(mode, x, W_q, W_k, W_v)
+        runs = [decode_steps(mode, x, W_q, W_k, W_v) for _ in range(trials)]
+
+    all_ms = [ns / 1e6 for run in runs for ns in run]
+    # quantiles needs two samples; with one (seq_len 1, one trial) every percentile is that sample
+    quantiles = statistics.quantiles(all_ms, n=100) if len(all_ms) > 1 else all_ms * 99
+    return {
+        "mode": mode,
+        "d_model": d_model,
+        "seq_len": seq_len,
+        "batch_size": batch_size,
+        "dtype": str(dtype).replace("torch.", ""),
+        "threads": threads,
+        "trials": trials,
+        "median_ms": statistics.median(all_ms),
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "mean_ms": statistics.fmean(all_ms),
+        "tokens_per_sec": batch_size * seq_len * trials / (sum(all_ms) / 1000),
+        # Median over trials for every step position, to see whether latency grows with t
+        "per_step_median_ms": [statistics.median(run[i] / 1e6 for run in runs) for i in range(seq_len)],
+    }
+
+
+def write_csv(results, path):
+    fields = [k for k in results[0] if k != "per_step_median_ms"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def plot(json_path, out_path=None):
+    import matplotlib.pyplot as plt  # only needed for plotting
+
+    with open(json_path) as f:
+        results = json.load(f)["results"]
+    plt.figure(figsize=(10, 5))
+    for r in results:
+        label = f"{r['mode']} d={r['d_model']} B={r['batch_size']} {r['dtype']} thr={r['threads']}"
+        plt.plot(range(1, r["seq_len"] + 1), r["per_step_median_ms"], label=label)
+    plt.xlabel('Decoding Step')
+    plt.ylabel('Median Time (ms)')
+    plt.title('Time Taken per Decoding Step')
+    plt.grid(True)
+    plt.legend(fontsize=7)
+    plt.tight_layout()
+    if out_path:
+        plt.savefig(out_path)
+    else:
+        plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode-latency benchmark for the KV cache paths")
+    parser.add_argument("--mode", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--d-model", nargs="+", type=int, default=[512])
+    parser.add_argument("--seq-len", nargs="+", type=int, default=[256])
+    parser.add_argument("--batch-size", nargs="+", type=int, default=[1])
+    parser.add_argument("--dtype", nargs="+", default=["float32"], choices=["float32", "float16", "bfloat16"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[torch.get_num_threads()])
+    parser.add_argument("--warmup", type=int, default=2, help="untimed full decodes before measuring")
+    parser.add_argument("--trials", type=int, default=5, help="timed full decodes per configuration")
+    parser.add_argument("--pin", action="store_true", help="pin each configuration to `threads` CPUs (Linux)")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--csv", help="write summary rows to this CSV file")
+    parser.add_argument("--plot", metavar="JSON", help="plot a previous --json result instead of benchmarking")
+    parser.add_argument("--plot-out", help="save the plot here instead of showing it")
+    args = parser.parse_args()
+
+    if args.plot:
+        plot(args.plot, args.plot_out)
+        return
+    if args.pin and not hasattr(os, "sched_setaffinity"):
+        parser.error("--pin needs os.sched_setaffinity, which this platform doesn't have")
+
+    results = []
+    for mode, d_model, seq_len, batch_size, dtype, threads in itertools.product(
+        args.mode, args.d_model, args.seq_len, args.batch_size, args.dtype, args.threads
+    ):
+        allowed = pin_cpus(threads) if args.pin else None
+        try:
+            r = run_config(mode, d_model, seq_len, batch_size, dtype, threads, args.warmup, args.trials)
+        finally:
+            if allowed is not None:
+                os.sched_setaffinity(0, allowed)
+        r["pinned"] = args.pin
+        results.append(r)
+        print(f"{mode:13} d={d_model:<5} t={seq_len:<6} B={batch_size:<4} {r['dtype']:9} threads={threads:<3}"
+              f" median={r['median_ms']:.4f}ms p95={r['p95_ms']:.4f}ms p99={r['p99_ms']:.4f}ms")
+
+    if args.json:
+        meta = {"torch": torch.__version__, "python": platform.python_version(), "machine": platform.machine()}
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    if args.csv:
+        write_csv(results, args.csv)
+
+
+if __name__ == "__main__":
+    main()
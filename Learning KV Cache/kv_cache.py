@@ -0,0 +1,223 @@
+import torch
+
+
+# Preallocated KV cache: one (capacity, d_model) buffer each for K and V, written in place.
+# Replaces the `cache.append(K_t)` + `torch.cat(cache)` pattern, which copies the whole
+# cache on every decoding step (O(t^2) memory traffic over a sequence of length t).
+class KVCache:
+    def __init__(self, max_len, d_model, window=None, dtype=torch.float32, device=None):
+        # window=None -> fixed capacity of max_len tokens, appending past it raises
+        # window=w    -> ring buffer keeping only the last w tokens (sliding-window attention)
+        self.capacity = window if window is not None else max_len
+        self.d_model = d_model
+        self.window = window
+        self.K = torch.empty(self.capacity, d_model, dtype=dtype, device=device)  # (capacity, d_model)
+        self.V = torch.empty(self.capacity, d_model, dtype=dtype, device=device)  # (capacity, d_model)
+        self.seen = 0  # total tokens appended so far (can exceed capacity in ring mode)
+
+    def __len__(self):
+        # Number of tokens currently held in the cache
+        return min(self.seen, self.capacity)
+
+    def reset(self):
+        self.seen = 0
+
+    def append(self, K_t, V_t):
+        # K_t, V_t: (n, d_model), usually n = 1 during decoding
+        n = K_t.size(0)
+        if self.window is None:
+            if self.seen + n > self.capacity:
+                raise ValueError(f"KVCache full: {self.seen} + {n} tokens > capacity {self.capacity}")
+            self.K[self.seen : self.seen + n] = K_t
+            self.V[self.seen : self.seen + n] = V_t
+        else:
+            if n > self.capacity:
+                # Only the last `capacity` tokens can survive anyway
+                K_t, V_t = K_t[-self.capacity :], V_t[-self.capacity :]
+                self.seen += n - self.capacity
+                n = self.capacity
+            pos = self.seen % self.capacity
+            first = min(n, self.capacity - pos)  # rows that fit before wrapping around
+            self.K[pos : pos + first] = K_t[:first]
+            self.V[pos : pos + first] = V_t[:first]
+            if first < n:
+                self.K[: n - first] = K_t[first:]
+                self.V[: n - first] = V_t[first:]
+        self.seen += n
+        return self.get()
+
+    def get(self):
+        # Zero-copy views of the filled part of the buffers: (len, d_model) each.
+        # In ring mode the rows are in buffer order, not time order. That is fine for
+        # attention here, since softmax(Q K^T) V does not depend on the order of the keys.
+        n = len(self)
+        return self.K[:n], self.V[:n]
+
+    def nbytes(self):
+        return self.K.element_size() * self.K.nelement() + self.V.element_size() * self.V.nelement()
+
+
+# Batched version: one (B, max_len, d_model) buffer shared by B sequences ("slots") of
+# different lengths. lengths[b] is how many tokens slot b holds; positions past it are padding.
+class BatchedKVCache:
+    def __init__(self, batch_size, max_len, d_model, dtype=torch.float32, device=None):
+        self.batch_size = batch_size
+        self.max_len = max_len
+        self.d_model = d_model
+        self.K = torch.zeros(batch_size, max_len, d_model, dtype=dtype, device=device)  # (B, max_len, d_model)
+        self.V = torch.zeros(batch_size, max_len, d_model, dtype=dtype, device=device)  # (B, max_len, d_model)
+        self.lengths = torch.zeros(batch_size, dtype=torch.long, device=device)      # (B,)
+        self.positions = torch.arange(max_len, device=device)                         # (max_len,)
+
+    def reset(self, slot):
+        # Hand slot over to a new sequence; old rows are simply overwritten later
+        self.lengths[slot] = 0
+
+    def append(self, slots, K_t, V_t):
+        # slots: (n,) slot indices, K_t / V_t: (n, d_model) -> one new token per slot
+        pos = self.lengths[slots]
+        if (pos >= self.max_len).any():
+            raise ValueError(f"BatchedKVCache full: a slot already holds {self.max_len} tokens")
+        self.K[slots, pos] = K_t
+        self.V[slots, pos] = V_t
+        self.lengths[slots] += 1
+
+    def get(self):
+        # Zero-copy views trimmed to the longest sequence, plus the padding mask:
+        # K, V: (B, L, d_model), mask: (B, L) with True where the key is a real token
+        L = max(int(self.lengths.max()), 1)
+        mask = self.positions[:L] < self.lengths[:, None]
+        return self.K[:, :L], self.V[:, :L], mask
+
+    def nbytes(self):
+        return self.K.element_size() * self.K.nelement() + self.V.element_size() * self.V.nelement()
+
+
+# KV cache stored in fewer bits: "float16" / "bfloat16", or "int8" with one scale per cached
+# token (granularity="token") or per channel (granularity="channel"). In channel mode the
+# scales only grow: when a new token exceeds the current range of a channel, that channel's
+# scale is raised and the rows already cached are requantized to it.
+# attend() never dequantizes the whole cache: it walks it block_size tokens at a time with an
+# online softmax (as in tiled_attention), so only one block is converted to Q's dtype at once,
+# and the scales are folded into Q, the scores or the softmax weights.
+class QuantizedKVCache:
+    def __init__(self, max_len, d_model, mode="int8", granularity="token", device=None):
+        if mode not in ("int8", "float16", "bfloat16"):
+            raise ValueError(f"Unknown mode {mode!r}, expected 'int8', 'float16' or 'bfloat16'")
+        if granularity not in ("token", "channel"):
+            raise ValueError(f"Unknown granularity {granularity!r}, expected 'token' or 'channel'")
+        self.capacity = max_len
+        self.d_model = d_model
+        self.window = None  # same interface as KVCache, so Attention.forward_step accepts it
+        self.mode = mode
+        self.granularity = granularity
+        dtype = torch.int8 if mode == "int8" else getattr(torch, mode)
+        self.K = torch.empty(max_len, d_model, dtype=dtype, device=device)  # (capacity, d_model)
+        self.V = torch.empty(max_len, d_model, dtype=dtype, device=device)  # (capacity, d_model)
+        self.K_scale = self.V_scale = None
+        if mode == "int8" and granularity == "token":
+            self.K_scale = torch.empty(max_len, device=device)  # (capacity,)
+            self.V_scale = torch.empty(max_len, device=device)  # (capacity,)
+        self.seen = 0
+
+    def __len__(self):
+        return self.seen
+
+    def reset(self):
+        self.seen = 0
+        if self.granularity == "channel":
+            self.K_scale = self.V_scale = None
+
+    @staticmethod
+    def _scale(x, dim):
+        # Symmetric int8 scale so that the largest |value| maps to 127
+        return x.abs().amax(dim=dim).clamp(min=1e-8) / 127
+
+    @staticmethod
+    def _quantize(x, scale):
+        return (x / scale).round().clamp(-127, 127).to(torch.int8)
+
+    def write(self, K_t, V_t):
+        # K_t, V_t: (n, d_model) float tensors
+        n = K_t.size(0)
+        if self.seen + n > self.capacity:
+            raise ValueError(f"QuantizedKVCache full: {self.seen} + {n} tokens > capacity {self.capacity}")
+        rows = slice(self.seen, self.seen + n)
+        if self.mode != "int8":
+            self.K[rows] = K_t
+            self.V[rows] = V_t
+        elif self.granularity == "token":
+            self.K_scale[rows] = self._scale(K_t, dim=-1)
+            self.V_scale[rows] = self._scale(V_t, dim=-1)
+            self.K[rows] = self._quantize(K_t, self.K_scale[rows, None])
+            self.V[rows] = self._quantize(V_t, self.V_scale[rows, None])
+        else:
+            self.K_scale = self._grow_scale(self.K, self.K_scale, K_t)  # (d_model,)
+            self.V_scale = self._grow_scale(self.V, self.V_scale, V_t)  # (d_model,)
+            self.K[rows] = self._quantize(K_t, self.K_scale)
+            self.V[rows] = self._quantize(V_t, self.V_scale)
+        self.seen += n
+
+    def _grow_scale(self, cache, scale, x):
+        # Per-channel scale covering both the cached rows and x; cached rows are requantized
+        # to the new scale in the channels where it grew
+        needed = self._scale(x, dim=0)
+        if scale is None:
+            return needed
+        new_scale = torch.maximum(scale, needed)
+        grown = new_scale > scale
+        if self.seen and grown.any():
+            old = cache[:self.seen, grown].float() * scale[grown]
+            cache[:self.seen, grown] = self._quantize(old, new_scale[grown])
+        return new_scale
+
+    def append(self, K_t, V_t):
+        # Same contract as KVCache.append (returns the cache as float tensors). Use write() +
+        # attend() in the decode loop to avoid dequantizing the whole cache every step.
+        self.write(K_t, V_t)
+        return self.get()
+
+    def get(self):
+        # Dequantized copies: (len, d_model) each
+        n = self.seen
+        K, V = self.K[:n].float(), self.V[:n].float()
+        if self.mode == "int8":
+            if self.granularity == "token":
+                K, V = K * self.K_scale[:n, None], V * self.V_scale[:n, None]
+            else:
+                K, V = K * self.K_scale, V * self.V_scale
+        return K, V
+
+    def attend(self, Q, block_size=256):
+        # softmax(Q K^T / sqrt(d_model)) V over every cached token, Q: (m, d_model) -> (m, d_model)
+        q = Q / self.d_model**0.5
+        if self.mode == "int8" and self.granularity == "channel":
+            q = q * self.K_scale                         # Q (K * s)^T == (Q * s) K^T
+        row_max = q.new_full((q.size(0), 1), float('-inf'))  # running max per query row
+        row_sum = q.new_zeros((q.size(0), 1))                # running softmax denominator
+        acc = q.new_zeros((q.size(0), self.d_model))         # running (unnormalized) output
+        for k0 in range(0, self.seen, block_size):
+            k1 = min(k0 + block_size, self.seen)
+            k, v = self.K[k0:k1].to(Q.dtype), self.V[k0:k1].to(Q.dtype)  # one block only
+            scores = q @ k.T                             # (m, block)
+            if self.mode == "int8" and self.granularity == "token":
+                scores = scores * self.K_scale[k0:k1]    # scale column j by token j's scale
+            new_max = torch.maximum(row_max, scores.amax(dim=-1, keepdim=True))
+            p = torch.exp(scores - new_max)
+            correction = torch.exp(row_max - new_max)
+            row_sum = row_sum * correction + p.sum(dim=-1, keepdim=True)
+            if self.mode == "int8" and self.granularity == "token":
+                p = p * self.V_scale[k0:k1]              # weight of token j times its scale
+            acc = acc * correction + p @ v
+            row_max = new_max
+        out = acc / row_sum
+        if self.mode == "int8" and self.granularity == "channel":
+            out = out * self.V_scale                     # per-channel scale on the output
+        return out
+
+    def nbytes(self):
+        total = self.K.element_size() * self.K.nelement() + self.V.element_size() * self.V.nelement()
+        for scale in (self.K_scale, self.V_scale):
+            if scale is not None:
+                total += scale.element_size() * scale.nelement()
+        return total
@@ -0,0 +1,231 @@
+import importlib
+import time
+
+import torch
+
+Attention = importlib.import_module("self-attention").Attention
+
+
+# Paged KV cache: K and V live in one preallocated pool of fixed-size token blocks.
+# Each sequence owns a block table (list of block ids) instead of its own tensors, so memory
+# is handed out block by block without fragmentation. Blocks are reference counted: sequences
+# with the same prompt prefix point at the same blocks and only copy one when they write to it
+# (copy-on-write).
+class BlockPool:
+    def __init__(self, num_blocks, block_size, d_model, dtype=torch.float32, device=None):
+        self.num_blocks = num_blocks
+        self.block_size = block_size
+        self.d_model = d_model
+        self.K = torch.empty(num_blocks, block_size, d_model, dtype=dtype, device=device)  # (num_blocks, block_size, d_model)
+        self.V = torch.empty(num_blocks, block_size, d_model, dtype=dtype, device=device)  # (num_blocks, block_size, d_model)
+        self.ref_counts = [0] * num_blocks
+        self.free_blocks = list(range(num_blocks - 1, -1, -1))  # stack, block 0 handed out first
+        # Full prompt blocks kept for reuse: (parent block id or None, token ids of the block) -> block id.
+        # Chaining on the parent keeps each key one block long while still identifying the whole prefix.
+        # The index holds a reference of its own to each cached block and to its parent, so cached
+        # blocks outlive the sequence that filled them and a parent is only evicted after its children.
+        self.prefix_index = {}
+
+    def num_free(self):
+        return len(self.free_blocks)
+
+    def allocate(self):
+        if not self.free_blocks:
+            self._evict_prefix()
+        block = self.free_blocks.pop()
+        self.ref_counts[block] = 1
+        return block
+
+    def incref(self, block):
+        self.ref_counts[block] += 1
+
+    def decref(self, block):
+        self.ref_counts[block] -= 1
+        if self.ref_counts[block] == 0:
+            self.free_blocks.append(block)
+
+    def _evict_prefix(self):
+        # Drop the oldest cached prefix block that no running sequence uses any more
+        for key, block in self.prefix_index.items():
+            if self.ref_counts[block] == 1:
+                del self.prefix_index[key]
+                self.decref(block)
+                if key[0] is not None:
+                    self.decref(key[0])
+                return
+        raise MemoryError(f"BlockPool exhausted: all {self.num_blocks} blocks are in use")
+
+
+class PagedKVCache:
+    def __init__(self, pool):
+        self.pool = pool
+        self.window = None      # same interface as kv_cache.KVCache
+        self.block_table = []   # block ids, in token order
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def fork(self):
+        # New sequence sharing every block of this one (e.g. several samples from one prompt)
+        child = PagedKVCache(self.pool)
+        child.block_table = list(self.block_table)
+        child.length = self.length
+        for block in self.block_table:
+            self.pool.incref(block)
+        return child
+
+    def free(self):
+        for block in self.block_table:
+            self.pool.decref(block)
+        self.block_table = []
+        self.length = 0
+
+    def match_prefix(self, token_ids):
+        # Attach the cached blocks covering the longest block-aligned prefix of token_ids.
+        # Returns how many tokens are already in the cache, i.e. how much prefill can be skipped.
+        # The last token is never matched: its output is needed to start decoding.
+        if self.length:
+            raise ValueError("match_prefix must be called on an empty sequence")
+        bs = self.pool.block_size
+        block = None
+        for end in range(bs, len(token_ids), bs):
+            block = self.pool.prefix_index.get((block, tuple(token_ids[end - bs : end])))
+            if block is None:
+                break
+            self.pool.incref(block)
+            self.block_table.append(block)
+            self.length = end
+        return self.length
+
+    def register_prefix(self, token_ids):
+        # Publish the full blocks holding token_ids (the prompt) so later sequences can share them
+        bs = self.pool.block_size
+        parent = None
+        for i, end in enumerate(range(bs, min(len(token_ids), self.length) + 1, bs)):
+            key = (parent, tuple(token_ids[end - bs : end]))
+            if key not in self.pool.prefix_index:
+                self.pool.prefix_index[key] = self.block_table[i]
+                self.pool.incref(self.block_table[i])
+                if parent is not None:
+                    self.pool.incref(parent)
+            parent = self.pool.prefix_index[key]
+
+    def _writable_block(self, index):
+        # Copy-on-write: a shared block is copied into a private one before it is modified
+        block = self.block_table[index]
+        if self.pool.ref_counts[block] > 1:
+            private = self.pool.allocate()
+            self.pool.K[private] = self.pool.K[block]
+            self.pool.V[private] = self.pool.V[block]
+            self.pool.decref(block)
+            self.block_table[index] = block = private
+        return block
+
+    def write(self, K_t, V_t):
+        # K_t, V_t: (n, d_model), copied block by block into the pool
+        bs = self.pool.block_size
+        done, n = 0, K_t.size(0)
+        while done < n:
+            offset = self.length % bs
+            if offset == 0:
+                self.block_table.append(self.pool.allocate())
+            block = self._writable_block(len(self.block_table) - 1)
+            take = min(bs - offset, n - done)
+            self.pool.K[block, offset : offset + take] = K_t[done : done + take]
+            self.pool.V[block, offset : offset + take] = V_t[done : done + take]
+            self.length += take
+            done += take
+
+    def append(self, K_t, V_t):
+        self.write(K_t, V_t)
+        return self.get()
+
+    def attend(self, Q):
+        # softmax(Q K^T / sqrt(d_model)) V for the last Q.size(0) tokens written, each one seeing the
+        # cached tokens up to its own position. Reads the pool block by block through the block table
+        # with an online softmax (as in tiled_attention), so K and V are never gathered into one tensor.
+        n, bs = Q.size(0), self.pool.block_size
+        q = Q / self.pool.d_model**0.5
+        q_pos = torch.arange(self.length - n, self.length, device=Q.device)[:, None]  # (n, 1)
+        row_max = q.new_full((n, 1), float('-inf'))  # running max per query row
+        row_sum = q.new_zeros((n, 1))                # running softmax denominator
+        acc = q.new_zeros((n, self.pool.d_model))    # running (unnormalized) output
+        for i, block in enumerate(self.block_table):
+            start = i * bs
+            valid = min(bs, self.length - start)
+            k, v = self.pool.K[block, :valid], self.pool.V[block, :valid]  # views, no copy
+            scores = q @ k.T                         # (n, valid)
+            if start + valid > self.length - n:      # block overlaps the new tokens: causal mask
+                k_pos = torch.arange(start, start + valid, device=Q.device)
+                scores = scores.masked_fill(k_pos > q_pos, float('-inf'))
+            new_max = torch.maximum(row_max, scores.amax(dim=-1, keepdim=True))
+            p = torch.exp(scores - new_max)
+            correction = torch.exp(row_max - new_max)
+            row_sum = row_sum * correction + p.sum(dim=-1, keepdim=True)
+            acc = acc * correction + p @ v
+            row_max = new_max
+        return acc / row_sum
+
+    def get(self):
+        # Read K, V through the block table: one gather over the pool, (len, d_model) each.
+        # Copies every live block; decode loops should use write() + attend() instead.
+        blocks = torch.tensor(self.block_table, dtype=torch.long, device=self.pool.K.device)
+        K = self.pool.K.index_select(0, blocks).flatten(0, 1)[: self.length]
+        V = self.pool.V.index_select(0, blocks).flatten(0, 1)[: self.length]
+        return K, V
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    d_model = 256
+    vocab_size = 1000
+    block_size = 16
+    num_requests = 32
+    system_prompt_len = 512
+    user_prompt_len = 64
+    decode_steps = 32
+
+    attn = Attention(d_model)
+    embedding = torch.randn(vocab_size, d_model)
+    system_prompt = torch.randint(vocab_size, (system_prompt_len,)).tolist()
+    prompts = [system_prompt + torch.randint(vocab_size, (user_prompt_len,)).tolist() for _ in range(num_requests)]
+
+    def step(x_t, cache):
+        # Attention.forward_step without the gather: attention runs over the block table in place
+        Q, K_t, V_t = attn.qkv(x_t)
+        cache.write(K_t, V_t)
+        return cache.attend(Q)
+
+    def serve(share_prefix):
+        # Runs every request through prefill + a few decode steps; returns (seconds, peak blocks used, outputs)
+        tokens_per_request = system_prompt_len + user_prompt_len + decode_steps
+        pool = BlockPool(num_requests * (tokens_per_request // block_size + 1), block_size, d_model)
+        sequences, outputs = [], []
+        peak_blocks = 0
+        start = time.perf_counter()
+        with torch.no_grad():
+            for token_ids in prompts:
+                cache = PagedKVCache(pool)
+                cached = cache.match_prefix(token_ids) if share_prefix else 0
+                # Prefill only the tokens that aren't cached yet, as one chunk
+                out = step(embedding[token_ids[cached:]], cache)
+                if share_prefix:
+                    cache.register_prefix(token_ids)
+                x_t = out[-1:]
+                for _ in range(decode_steps):
+                    x_t = step(x_t, cache)
+                outputs.append(x_t)
+                sequences.append(cache)
+                peak_blocks = max(peak_blocks, pool.num_blocks - pool.num_free())
+        return time.perf_counter() - start, peak_blocks, outputs
+
+    base_time, base_blocks, base_outputs = serve(share_prefix=False)
+    shared_time, shared_blocks, shared_outputs = serve(share_prefix=True)
+    for a, b in zip(base_outputs, shared_outputs):
+        assert torch.allclose(a, b, atol=1e-4), "Prefix sharing changed the output"
+
+    block_bytes = 2 * block_size * d_model * 4
+    print(f"{num_requests} requests, {system_prompt_len}-token shared system prompt, block_size={block_size}")
+    print(f"  No sharing    : {base_time:.3f}s, {base_blocks} blocks ({base_blocks * block_bytes / 2**20:.1f}MB)")
+    print(f"  Prefix sharing: {shared_time:.3f}s, {shared_blocks} blocks ({shared_blocks * block_bytes / 2**20:.1f}MB)")
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+import torch
+import torch.nn.functional as F
+
+from kv_cache import KVCache, QuantizedKVCache
+
+# Parameters
+d_model = 512     # Embedding dimension
+t = 2048          # Sequence length
+prompt_len = 128  # Prompt tokens written in one chunk before decoding (sets per-channel scales)
+torch.manual_seed(0)
+x = torch.randn(t, d_model)  # Random input sequence
+
+# Random projection matrices
+W_q = torch.randn(d_model, d_model) / d_model**0.5
+W_k = torch.randn(d_model, d_model) / d_model**0.5
+W_v = torch.randn(d_model, d_model) / d_model**0.5
+
+
+def decode(cache):
+    # Returns the outputs (t - prompt_len, d_model) of the decoding steps and their timings in ms
+    prompt = x[:prompt_len]
+    if isinstance(cache, QuantizedKVCache):
+        cache.write(prompt @ W_k, prompt @ W_v)
+    else:
+        cache.append(prompt @ W_k, prompt @ W_v)
+
+    outputs, timings = [], []
+    for step in range(prompt_len, t):
+        x_t = x[step : step + 1]  # (1, d_model)
+
+        start = time.perf_counter()
+        Q = x_t @ W_q
+        K_t = x_t @ W_k
+        V_t = x_t @ W_v
+        if isinstance(cache, QuantizedKVCache):
+            cache.write(K_t, V_t)
+            output = cache.attend(Q)                 # dequantized inside the matmuls
+        else:
+            K_all, V_all = cache.append(K_t, V_t)
+            weights = F.softmax(Q @ K_all.T / d_model**0.5, dim=-1)
+            output = weights @ V_all
+        timings.append((time.perf_counter() - start) * 1000)
+        outputs.append(output)
+    return torch.cat(outputs, dim=0), timings
+
+
+reference, ref_timings = decode(KVCache(max_len=t, d_model=d_model))
+ref_bytes = 2 * t * d_model * 4
+
+caches = {
+    "float16": QuantizedKVCache(t, d_model, mode="float16"),
+    "bfloat16": QuantizedKVCache(t, d_model, mode="bfloat16"),
+    "int8 per-token": QuantizedKVCache(t, d_model, mode="int8", granularity="token"),
+    "int8 per-channel": QuantizedKVCache(t, d_model, mode="int8", granularity="channel"),
+}
+
+print(f"d_model={d_model}, {prompt_len} prompt tokens + {t - prompt_len} decoding steps")
+print(f"{'Storage':18} {'Cache size':>11} {'Saved':>7} {'Median step':>12} {'Max abs err':>12} {'Rel err':>9}")
+print(f"{'float32':18} {ref_bytes / 2**20:>9.1f}MB {'-':>7} {statistics.median(ref_timings):>10.3f}ms {'-':>12} {'-':>9}")
+for name, cache in caches.items():
+    output, timings = decode(cache)
+    saved = 1 - cache.nbytes() / ref_bytes
+    max_err = (output - reference).abs().max().item()
+    rel_err = ((output - reference).norm() / reference.norm()).item()
+    print(f"{name:18} {cache.nbytes() / 2**20:>9.1f}MB {saved:>6.0%} {statistics.median(timings):>10.3f}ms {max_err:>12.2e} {rel_err:>9.2e}")
@@ -3,29 +3,193 @@ import torch.nn as nn
 import torch.nn.functional as F
 import matplotlib.pyplot as plt
 
+# Attention without the [seq_len, seq_len] matrix: K/V (and Q) are processed in blocks and the
+# softmax is accumulated online with a running max and sum per query row (as in FlashAttention).
+# Peak extra memory is O(block_size^2) instead of O(seq_len^2); the result matches softmax(QK^T)V.
+def tiled_attention(Q, K, V, causal = False, block_size = 128):
+    # Q: [..., T, d], K, V: [..., S, d]. With causal=True the T queries are the last T of the S positions.
+    T, S = Q.size(-2), K.size(-2)
+    offset = S - T
+    output = Q.new_empty(*Q.shape[:-1], V.size(-1)) # [..., T, d_v]
+    for q0 in range(0, T, block_size):
+        q = Q[..., q0 : q0 + block_size, :] / Q.size(-1)**0.5 # [..., bq, d]
+        bq = q.size(-2)
+        row_max = q.new_full((*q.shape[:-1], 1), float('-inf')) # running max per query row
+        row_sum = q.new_zeros((*q.shape[:-1], 1))               # running softmax denominator
+        acc = q.new_zeros((*q.shape[:-1], V.size(-1)))          # running (unnormalized) output
+        k_end = min(S, offset + q0 + bq) if causal else S       # later blocks are fully masked
+        for k0 in range(0, k_end, block_size):
+            k = K[..., k0 : k0 + block_size, :]
+            scores = torch.matmul(q, k.transpose(-2, -1)) # [..., bq, bk]
+            if causal and k0 + k.size(-2) - 1 > offset + q0:
+                rows = offset + q0 + torch.arange(bq, device=Q.device)[:, None]
+                cols = k0 + torch.arange(k.size(-2), device=Q.device)[None, :]
+                scores = scores.masked_fill(cols > rows, float('-inf'))
+            new_max = torch.maximum(row_max, scores.amax(dim=-1, keepdim=True))
+            p = torch.exp(scores - new_max)
+            correction = torch.exp(row_max - new_max) # rescales what was accumulated under the old max
+            row_sum = row_sum * correction + p.sum(dim=-1, keepdim=True)
+            acc = acc * correction + torch.matmul(p, V[..., k0 : k0 + block_size, :])
+            row_max = new_max
+        output[..., q0 : q0 + bq, :] = acc / row_sum
+    return output
+
+
 # 4. Self-attention module
 class Attention(nn.Module):
     def __init__(self, d_model):
         super().__init__()
-        self.Wq = nn.Linear(d_model, d_model, bias=False) # shape: [d_model, d_model] (8, 8)
-        self.Wk = nn.Linear(d_model, d_model, bias=False) # shape: [d_model, d_model] (8, 8)
-        self.Wv = nn.Linear(d_model, d_model, bias=False) # shape: [d_model, d_model] (8, 8)
-
-    def forward(self, x, mask = False):
-        Q = self.Wq(x) # shape: [batch_size, seq_len, d_model] (1, 12, 8)
-        K = self.Wk(x) # shape: [batch_size, seq_len, d_model] (1, 12, 8)
-        V = self.Wv(x) # shape: [batch_size, seq_len, d_model] (1, 12, 8)
+        self.d_model = d_model
+        self.kv_dim = d_model  # width of one cached K (or V) row
+        # Wq, Wk and Wv fused into one projection: a single matmul instead of three
+        self.Wqkv = nn.Linear(d_model, 3 * d_model, bias=False) # shape: [d_model, 3 * d_model] (8, 24)
+        self._causal_mask = torch.empty(0, 0, dtype=torch.bool)  # grown on demand, reused across calls
+
+    def qkv(self, x):
+        # Split the fused projection back into Q, K, V (views, no copy)
+        return self.Wqkv(x).split(self.d_model, dim=-1) # 3 x [..., d_model]
+
+    def cache_bytes_per_token(self, dtype=torch.float32):
+        # One K row and one V row of kv_dim values each
+        return 2 * self.kv_dim * torch.tensor([], dtype=dtype).element_size()
+
+    def causal_mask(self, seq_len, device):
+        # True above the diagonal (future tokens). Built once for the longest seq_len seen so far.
+        if self._causal_mask.size(0) < seq_len or self._causal_mask.device != device:
+            self._causal_mask = torch.triu(torch.ones(seq_len, seq_len, dtype=torch.bool, device=device), diagonal=1)
+        return self._causal_mask[:seq_len, :seq_len]
+
+    def forward(self, x, mask = False, need_weights = True, block_size = None):
+        Q, K, V = self.qkv(x) # shape: [batch_size, seq_len, d_model] (1, 12, 8) each
         d_k = Q.size(-1)
+
+        if block_size is not None:
+            # Tiled path for long sequences; never materializes scores / weights
+            return None, tiled_attention(Q, K, V, causal=mask, block_size=block_size), None
+
+        if not need_weights:
+            # Fused kernel, never hands back the [seq_len, seq_len] scores / weights
+            output = F.scaled_dot_product_attention(Q, K, V, is_causal=mask)
+            return None, output, None
+
         scores = torch.matmul(Q, K.transpose(-2, -1))  # [batch_size, seq_len, seq_len] (1, 12, 12)
-        
-        if mask:             
-            seq_len = x.size(1)
-            # Mask M: 0s in the lower triangle (visible), -inf in upper triangle (masked future tokens)
-            M = torch.triu(torch.ones(seq_len, seq_len), diagonal=1).to(x.device)  # [seq_len, seq_len]
-            M = M.masked_fill(M == 1, float('-inf')).masked_fill(M == 0, 0.0)
-            scores = scores + M  # Add the mask *before* scaling
+
+        if mask:
+            # -inf in upper triangle (masked future tokens), the lower triangle is left as is
+            scores = scores.masked_fill(self.causal_mask(x.size(1), x.device), float('-inf'))
 
         scores = scores / d_k**0.5  # scale after adding the mask
         weights = F.softmax(scores, dim=-1)  # attention weights  # [batch_size, seq_len, seq_len] (1, 12, 12)
         output = torch.matmul(weights, V)  # shape: [batch_size, seq_len, d_model] (1, 12, 8)
-        return scores, output, weights
\ No newline at end of file
+        return scores, output, weights
+
+    def forward_step(self, x_t, cache, need_weights = False):
+        # Incremental decoding: x_t holds only the new token(s) [n, d_model], usually n = 1.
+        # Their K, V go into `cache` (kv_cache.KVCache) and only their rows of attention are computed.
+        n = x_t.size(0)
+        if n > 1 and cache.window is not None:
+            raise ValueError("forward_step on a sliding-window cache takes one token at a time")
+
+        Q, K_t, V_t = self.qkv(x_t) # [n, d_model] each
+        K, V = cache.append(K_t, V_t) # [cache_len, d_model] each
+
+        if not need_weights:
+            # New token i may look at every cached key up to its own position
+            attn_mask = None
+            if n > 1:
+                attn_mask = ~self.causal_mask(K.size(0), x_t.device)[-n:]  # [n, cache_len], True = visible
+            output = F.scaled_dot_product_attention(Q, K, V, attn_mask=attn_mask)
+            return None, output, None
+
+        scores = torch.matmul(Q, K.transpose(-2, -1)) # [n, cache_len]
+        if n > 1:
+            scores = scores.masked_fill(self.causal_mask(K.size(0), x_t.device)[-n:], float('-inf'))
+        scores = scores / self.d_model**0.5
+        weights = F.softmax(scores, dim=-1) # [n, cache_len]
+        output = torch.matmul(weights, V) # [n, d_model]
+        return scores, output, weights
+
+
+# Multi-head attention where groups of query heads share one K/V head.
+#   n_kv_heads == n_heads -> multi-head attention (MHA)
+#   n_kv_heads == 1       -> multi-query attention (MQA)
+#   anything in between   -> grouped-query attention (GQA)
+# Only n_kv_heads * head_dim values of K and V are cached per token instead of d_model, and the
+# cache keeps the same [seq_len, kv_dim] layout, so kv_cache.KVCache works with every variant.
+class GroupedQueryAttention(nn.Module):
+    def __init__(self, d_model, n_heads, n_kv_heads):
+        super().__init__()
+        if d_model % n_heads != 0 or n_heads % n_kv_heads != 0:
+            raise ValueError(f"d_model={d_model} must be divisible by n_heads={n_heads}, and n_heads by n_kv_heads={n_kv_heads}")
+        self.d_model = d_model
+        self.n_heads = n_heads
+        self.n_kv_heads = n_kv_heads
+        self.group = n_heads // n_kv_heads # query heads per K/V head
+        self.head_dim = d_model // n_heads
+        self.kv_dim = n_kv_heads * self.head_dim
+        self.Wqkv = nn.Linear(d_model, d_model + 2 * self.kv_dim, bias=False) # shape: [d_model, d_model + 2 * kv_dim]
+        self.Wo = nn.Linear(d_model, d_model, bias=False) # mixes the heads back together
+        self._causal_mask = torch.empty(0, 0, dtype=torch.bool)
+
+    causal_mask = Attention.causal_mask
+    cache_bytes_per_token = Attention.cache_bytes_per_token
+
+    def qkv(self, x):
+        return self.Wqkv(x).split([self.d_model, self.kv_dim, self.kv_dim], dim=-1)
+
+    def _split_heads(self, t, n):
+        return t.unflatten(-1, (n, self.head_dim)).transpose(-3, -2) # [..., T, n * head_dim] -> [..., n, T, head_dim]
+
+    def _attend(self, Q, K, V, hidden, need_weights):
+        # Q: [..., T, d_model], K, V: [..., S, kv_dim], hidden: [T, S] with True = masked, or None
+        T = Q.size(-2)
+        # The query heads sharing a K/V head are stacked as extra query rows: [..., n_kv_heads, group * T, head_dim].
+        # K and V are never repeated per query head.
+        Q = self._split_heads(Q, self.n_heads).unflatten(-3, (self.n_kv_heads, self.group)).flatten(-3, -2)
+        K = self._split_heads(K, self.n_kv_heads) # [..., n_kv_heads, S, head_dim]
+        V = self._split_heads(V, self.n_kv_heads) # [..., n_kv_heads, S, head_dim]
+        if hidden is not None:
+            hidden = hidden.repeat(self.group, 1) # [group * T, S]
+
+        scores = weights = None
+        if need_weights:
+            scores = torch.matmul(Q, K.transpose(-2, -1)) / self.head_dim**0.5 # [..., n_kv_heads, group * T, S]
+            if hidden is not None:
+                scores = scores.masked_fill(hidden, float('-inf'))
+            weights = F.softmax(scores, dim=-1)
+            output = torch.matmul(weights, V)
+            # [..., n_kv_heads, group * T, S] -> [..., n_heads, T, S]
+            scores = scores.unflatten(-2, (self.group, T)).flatten(-4, -3)
+            weights = weights.unflatten(-2, (self.group, T)).flatten(-4, -3)
+        else:
+            attn_mask = None if hidden is None else ~hidden
+            output = F.scaled_dot_product_attention(Q, K, V, attn_mask=attn_mask)
+
+        output = output.unflatten(-2, (self.group, T)).flatten(-4, -3) # [..., n_heads, T, head_dim]
+        output = self.Wo(output.transpose(-3, -2).flatten(-2)) # [..., T, d_model]
+        return scores, output, weights
+
+    def forward(self, x, mask = False, need_weights = False):
+        Q, K, V = self.qkv(x) # [batch_size, seq_len, d_model], [batch_size, seq_len, kv_dim] x 2
+        hidden = self.causal_mask(x.size(-2), x.device) if mask else None
+        return self._attend(Q, K, V, hidden, need_weights)
+
+    def forward_step(self, x_t, cache, need_weights = False):
+        # Same contract as Attention.forward_step; cache must be built with d_model=self.kv_dim
+        n = x_t.size(0)
+        if n > 1 and cache.window is not None:
+            raise ValueError("forward_step on a sliding-window cache takes one token at a time")
+        Q, K_t, V_t = self.qkv(x_t) # [n, d_model], [n, kv_dim] x 2
+        K, V = cache.append(K_t, V_t) # [cache_len, kv_dim] each
+        hidden = self.causal_mask(K.size(0), x_t.device)[-n:] if n > 1 else None
+        return self._attend(Q, K, V, hidden, need_weights)
+
+
+class MultiHeadAttention(GroupedQueryAttention):
+    def __init__(self, d_model, n_heads):
+        super().__init__(d_model, n_heads, n_kv_heads=n_heads)
+
+
+class MultiQueryAttention(GroupedQueryAttention):
+    def __init__(self, d_model, n_heads):
+        super().__init__(d_model, n_heads, n_kv_heads=1)
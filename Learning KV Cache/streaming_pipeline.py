@@ -0,0 +1,71 @@
+import importlib
+import statistics
+import time
+
+import torch
+
+from kv_cache import KVCache
+
+Attention = importlib.import_module("self-attention").Attention
+
+
+# Prefill / decode pipeline around Attention:
+#   prefill -> the prompt goes through forward_step in chunks of `chunk_size` tokens (large matmuls)
+#   decode  -> one token per step, each output is fed back in as the next input
+# generate() is a generator, so the caller gets every output as soon as it exists.
+# Time-to-first-token (prompt in -> first output out) and inter-token latency are recorded
+# separately in self.metrics, since they are governed by different phases.
+class StreamingPipeline:
+    def __init__(self, attn, max_len, chunk_size=256):
+        self.attn = attn
+        self.max_len = max_len
+        self.chunk_size = chunk_size
+        self.metrics = {}
+
+    @torch.no_grad()
+    def generate(self, prompt, max_new_tokens):
+        # prompt: (prompt_len, d_model) -> yields max_new_tokens outputs of shape (1, d_model)
+        if prompt.size(0) == 0 or max_new_tokens < 1:
+            raise ValueError("generate needs at least one prompt token and max_new_tokens >= 1")
+        if prompt.size(0) + max_new_tokens > self.max_len:
+            raise ValueError(f"{prompt.size(0)} prompt + {max_new_tokens} new tokens > max_len {self.max_len}")
+        cache = KVCache(self.max_len, self.attn.kv_dim)
+        self.metrics = {"prompt_tokens": prompt.size(0), "ttft_ms": None, "itl_ms": []}
+
+        start = time.perf_counter()
+        for i in range(0, prompt.size(0), self.chunk_size):
+            _, output, _ = self.attn.forward_step(prompt[i : i + self.chunk_size], cache, need_weights=False)
+        x_t = output[-1:]  # the last prompt position produces the first new token
+        self.metrics["ttft_ms"] = (time.perf_counter() - start) * 1000
+        yield x_t
+
+        for _ in range(max_new_tokens - 1):
+            # Clock restarts once the caller asks for the next token, so ITL excludes its own work
+            start = time.perf_counter()
+            _, x_t, _ = self.attn.forward_step(x_t, cache, need_weights=False)
+            self.metrics["itl_ms"].append((time.perf_counter() - start) * 1000)
+            yield x_t
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    d_model = 512
+    prompt_len = 1024
+    max_new_tokens = 64
+    attn = Attention(d_model)
+    prompt = torch.randn(prompt_len, d_model)
+
+    # chunk_size=1 is the old behaviour: the prompt fed one token at a time through the cached path
+    print(f"prompt_len={prompt_len}, max_new_tokens={max_new_tokens}, d_model={d_model}")
+    print(f"{'chunk_size':>10} {'TTFT':>10} {'ITL p50':>9} {'ITL p95':>9}")
+    reference = None
+    for chunk_size in [1, 16, 128, 512, prompt_len]:
+        pipeline = StreamingPipeline(attn, max_len=prompt_len + max_new_tokens, chunk_size=chunk_size)
+        outputs = torch.cat(list(pipeline.generate(prompt, max_new_tokens)), dim=0)
+        if reference is None:
+            reference = outputs
+        assert torch.allclose(outputs, reference, atol=1e-3), f"chunk_size={chunk_size} changed the output"
+
+        itl = sorted(pipeline.metrics["itl_ms"])
+        p95 = itl[int(0.95 * (len(itl) - 1))]
+        print(f"{chunk_size:>10} {pipeline.metrics['ttft_ms']:>8.2f}ms {statistics.median(itl):>7.3f}ms {p95:>7.3f}ms")
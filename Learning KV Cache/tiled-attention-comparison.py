@@ -0,0 +1,59 @@
+import importlib
+import multiprocessing as mp
+import resource
+import time
+
+import torch
+import torch.nn.functional as F
+
+attention = importlib.import_module("self-attention")
+
+# Parameters
+d_model = 64                              # Embedding dimension
+seq_lens = [1024, 2048, 4096, 8192, 16384]
+block_size = 256                          # Tile size of the tiled path
+
+
+def full_attention(Q, K, V):
+    # Current path: materializes the full (seq_len, seq_len) scores and weights
+    scores = Q @ K.transpose(-2, -1) / Q.size(-1)**0.5
+    mask = torch.triu(torch.ones(Q.size(-2), K.size(-2), dtype=torch.bool), diagonal=1)
+    weights = F.softmax(scores.masked_fill(mask, float('-inf')), dim=-1)
+    return weights @ V
+
+
+def run(impl, seq_len, results):
+    # Runs in a fresh process so ru_maxrss is the peak of this one configuration only
+    torch.manual_seed(0)
+    Q, K, V = (torch.randn(1, seq_len, d_model) for _ in range(3))
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+    start = time.perf_counter()
+    if impl == "full":
+        full_attention(Q, K, V)
+    else:
+        attention.tiled_attention(Q, K, V, causal=True, block_size=block_size)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    results.put((elapsed, peak / 1024))
+
+
+if __name__ == "__main__":
+    # Same output as the full path
+    torch.manual_seed(0)
+    Q, K, V = (torch.randn(2, 1000, d_model) for _ in range(3))
+    max_err = (full_attention(Q, K, V) - attention.tiled_attention(Q, K, V, causal=True, block_size=block_size)).abs().max()
+    print(f"Max abs difference tiled vs full: {max_err:.2e}")
+
+    ctx = mp.get_context("spawn")
+    print(f"d_model={d_model}, causal, block_size={block_size}")
+    print(f"{'seq_len':>8} {'full time':>10} {'full peak':>10} {'tiled time':>11} {'tiled peak':>11}")
+    for seq_len in seq_lens:
+        row = []
+        for impl in ["full", "tiled"]:
+            results = ctx.Queue()
+            proc = ctx.Process(target=run, args=(impl, seq_len, results))
+            proc.start()
+            proc.join()
+            row.append(results.get() if proc.exitcode == 0 else (float('nan'), float('nan')))  # nan = OOM / crash
+        (full_t, full_mem), (tiled_t, tiled_mem) = row
+        print(f"{seq_len:>8} {full_t:>9.3f}s {full_mem:>8.0f}MB {tiled_t:>10.3f}s {tiled_mem:>9.0f}MB")
@@ -0,0 +1,101 @@
+import math
+import time
+
+import numpy as np
+
+
+# Vectorized version of the softmax / temperature / argmax steps from Temperature.ipynb.
+# Works on a whole (batch, vocab) logits array at once, so it stays fast for real
+# vocabularies (50k-250k tokens) where the list + math.exp version does not.
+
+def softmax(logits, temperature=1.0):
+    """Numerically stable softmax over the last axis, logits / temperature first."""
+    scaled = np.asarray(logits, dtype=np.float32) / temperature
+    # Subtracting the row max doesn't change the result but keeps exp() from overflowing
+    exps = np.exp(scaled - scaled.max(axis=-1, keepdims=True))
+    return exps / exps.sum(axis=-1, keepdims=True)
+
+
+def sample(logits, temperature=1.0, top_k=None, top_p=None, min_p=None, rng=None):
+    """Sample one token id per row of a (batch, vocab) logits array.
+
+    temperature can be a scalar or one value per row; rows with temperature 0 are greedy.
+    top_k keeps the k largest logits (found with argpartition, no full sort), top_p keeps the
+    smallest set of tokens whose probability adds up to top_p, and min_p drops tokens whose
+    probability is below min_p times that of the most likely token. rng is a seed or a
+    np.random.Generator, so runs are reproducible.
+    """
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    logits = np.asarray(logits, dtype=np.float32)
+    single = logits.ndim == 1
+    if single:
+        logits = logits[None, :]
+    rng = np.random.default_rng(rng)
+    batch, vocab = logits.shape
+    temperature = np.broadcast_to(np.asarray(temperature, dtype=np.float32), (batch,))
+    greedy = temperature <= 0
+
+    # Top-k: only the k candidates per row take part in everything below
+    candidates = None
+    if top_k is not None and top_k < vocab:
+        candidates = np.argpartition(logits, vocab - top_k, axis=-1)[:, vocab - top_k :]  # (batch, k), unordered
+        logits = np.take_along_axis(logits, candidates, axis=-1)
+
+    probs = softmax(logits, np.where(greedy, 1.0, temperature)[:, None])
+
+    if min_p is not None:
+        probs = np.where(probs >= min_p * probs.max(axis=-1, keepdims=True), probs, 0.0)
+
+    if top_p is not None and top_p < 1.0:
+        order = np.argsort(-probs, axis=-1)
+        sorted_probs = np.take_along_axis(probs, order, axis=-1)
+        cumulative = np.cumsum(sorted_probs, axis=-1)
+        # Drop a token once the tokens before it already cover top_p of the (remaining) mass
+        drop_sorted = cumulative - sorted_probs >= top_p * cumulative[:, -1:]
+        drop = np.empty_like(drop_sorted)
+        np.put_along_axis(drop, order, drop_sorted, axis=-1)
+        probs = np.where(drop, 0.0, probs)
+
+    # Inverse-CDF sampling, one uniform number per row; filtered tokens have zero width
+    cdf = np.cumsum(probs, axis=-1)
+    u = rng.random((batch, 1), dtype=np.float32) * cdf[:, -1:]
+    choice = np.argmax(cdf > u, axis=-1)
+    choice = np.where(greedy, np.argmax(logits, axis=-1), choice)
+
+    if candidates is not None:
+        choice = np.take_along_axis(candidates, choice[:, None], axis=-1)[:, 0]
+    return choice[0] if single else choice
+
+
+# ============ List-based version from Temperature.ipynb (baseline) ============
+def softmax_list(x):
+    exps = [math.exp(i) for i in x]
+    sum_exps = sum(exps)
+    return [j / sum_exps for j in exps]
+
+
+def index_of_max(lst):
+    return lst.index(max(lst))
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'vocab':>8} {'batch':>6} {'list softmax+argmax':>20} {'numpy greedy':>13} {'top-k=50':>10} {'top-p=0.9':>10} {'min-p=0.05':>11}")
+    for vocab in [50_000, 250_000]:
+        for batch in [1, 32]:
+            logits = rng.standard_normal((batch, vocab), dtype=np.float32) * 3
+
+            start = time.perf_counter()
+            for row in logits.tolist():
+                index_of_max(softmax_list([v / 0.7 for v in row]))
+            list_time = time.perf_counter() - start
+
+            timings = []
+            for kwargs in [dict(temperature=0.0), dict(top_k=50), dict(top_p=0.9), dict(min_p=0.05)]:
+                start = time.perf_counter()
+                sample(logits, **{"temperature": 0.7, **kwargs}, rng=rng)
+                timings.append(time.perf_counter() - start)
+
+            print(f"{vocab:>8} {batch:>6} {list_time * 1000:>18.1f}ms" + "".join(
+                f" {t * 1000:>{w - 2}.2f}ms" for t, w in zip(timings, [13, 10, 10, 11])))
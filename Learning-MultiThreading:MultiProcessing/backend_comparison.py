@@ -0,0 +1,63 @@
+# Runs the prime (CPU-bound) and simulated I/O workloads through every executor backend,
+# including the free-threaded and subinterpreter ones where this Python supports them,
+# and prints startup cost, per-task transport (IPC / serialization) cost and run time side by side.
+#
+#   python backend_comparison.py
+#   python3.14t -X gil=0 backend_comparison.py    # free-threaded build
+
+import argparse
+import sys
+import time
+
+import cpu_bound_process
+from concurrency_bench import executors, io_tasks
+
+
+def run_io(backend, num_workers, num_tasks):
+    executor, _, _ = executors.make_executor(backend, num_workers)
+    with executor:
+        list(executor.map(io_tasks.simulate_io_task, range(num_tasks)))
+
+
+def compare_backends(end_range=2000000, num_io_tasks=200, num_workers=None):
+    num_workers = num_workers or cpu_bound_process.default_worker_count()
+    print(f"\n🧪 Backend comparison on Python {sys.version.split()[0]}, GIL enabled: {executors.gil_enabled()}")
+    print(f"   primes below {end_range} (trial division), {num_io_tasks} x 100ms simulated I/O, {num_workers} workers\n")
+    print(f"  {'Backend':15} {'Runs as':15} {'Startup':>9} {'IPC/task':>9} {'CPU-bound':>10} {'I/O-bound':>10}  Note")
+
+    results = {}
+    reference = None
+    for backend in executors.BACKENDS:
+        resolved, note = executors.resolve_backend(backend)
+        row = {"resolved": resolved, "note": note}
+        try:
+            row["startup_s"] = executors.measure_startup(backend, num_workers)
+            row["ipc_s"] = executors.measure_transport(backend, num_workers)  # a 10k-int list there and back
+
+            start = time.perf_counter()
+            primes = cpu_bound_process.find_primes_dynamic(1, end_range, num_workers, backend=backend)
+            row["cpu_s"] = time.perf_counter() - start
+            if reference is None:
+                reference = primes
+            assert primes == reference, f"{backend}: results don't match!"
+
+            start = time.perf_counter()
+            run_io(backend, num_workers, num_io_tasks)
+            row["io_s"] = time.perf_counter() - start
+        except Exception as exc:  # e.g. a module that can't be loaded in a subinterpreter
+            row["note"] = f"failed: {type(exc).__name__}: {exc}"
+        results[backend] = row
+
+        fmt = lambda key: f"{row[key]:.3f}s" if key in row else "-"
+        ipc = f"{row['ipc_s'] * 1e3:.2f}ms" if "ipc_s" in row else "-"
+        print(f"  {backend:15} {resolved:15} {fmt('startup_s'):>9} {ipc:>9} {fmt('cpu_s'):>10} {fmt('io_s'):>10}  {row['note']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare executor backends on the CPU- and I/O-bound workloads")
+    parser.add_argument("--end", type=int, default=2000000, help="find primes below this number")
+    parser.add_argument("--io-tasks", type=int, default=200, help="number of simulated 100ms I/O tasks")
+    parser.add_argument("--workers", type=int, help="pool size (default: usable CPUs)")
+    args = parser.parse_args()
+    compare_backends(args.end, args.io_tasks, args.workers)
@@ -0,0 +1,6 @@
+# Library side of the multithreading vs multiprocessing benchmarks.
+#
+# Pool workers import only the module holding the function they run (primes.py for the
+# CPU-bound demo, io_tasks.py for the I/O-bound one). Nothing heavy is imported here or
+# at the top of those modules: NumPy is loaded inside the sieve functions, requests inside
+# the HTTP functions, and matplotlib / seaborn only in plotting.py.
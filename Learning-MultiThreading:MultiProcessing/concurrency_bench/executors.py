@@ -0,0 +1,71 @@
+# Executor backends for the threading vs multiprocessing comparison
+#
+#   thread          -> ThreadPoolExecutor (overlaps I/O because blocking calls release the GIL)
+#   process         -> ProcessPoolExecutor (true parallelism, pays for startup + pickling)
+#   free-threaded   -> ThreadPoolExecutor on a free-threaded (no-GIL) build, Python 3.13t+
+#   subinterpreter  -> InterpreterPoolExecutor, one interpreter with its own GIL per worker, Python 3.14+
+#
+# The last two depend on the interpreter, so they're detected at runtime and fall back to the
+# closest backend that is available (plain threads / processes) with a note saying why.
+
+import concurrent.futures
+import sys
+import time
+
+BACKENDS = ["thread", "process", "free-threaded", "subinterpreter"]
+
+def gil_enabled():
+    """False only on a free-threaded build running with the GIL actually disabled"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def interpreter_pool_available():
+    return hasattr(concurrent.futures, "InterpreterPoolExecutor")
+
+def resolve_backend(backend):
+    """Return (backend that will really be used, note explaining a fallback or '')"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "free-threaded" and gil_enabled():
+        return "thread", "GIL is enabled in this interpreter, using plain threads"
+    if backend == "subinterpreter" and not interpreter_pool_available():
+        return "process", "InterpreterPoolExecutor needs Python 3.14+, using processes"
+    return backend, ""
+
+def make_executor(backend, max_workers):
+    """Return (executor, backend really used, fallback note)"""
+    resolved, note = resolve_backend(backend)
+    if resolved in ("thread", "free-threaded"):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    elif resolved == "process":
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        executor = concurrent.futures.InterpreterPoolExecutor(max_workers=max_workers)
+    return executor, resolved, note
+
+def noop(_):
+    return None
+
+def measure_startup(backend, max_workers):
+    """Seconds to create the pool, get one trivial task through every worker and shut it down"""
+    start = time.perf_counter()
+    executor, _, _ = make_executor(backend, max_workers)
+    with executor:
+        list(executor.map(noop, range(max_workers)))
+    return time.perf_counter() - start
+
+def echo(payload):
+    return payload
+
+def measure_transport(backend, max_workers, payload_size=10000, rounds=50):
+    """Seconds per task spent moving a payload of payload_size ints to a worker and back
+    (pickling + pipe for processes, next to nothing for threads), measured on a warm pool
+    with a task that does no work, so it's the IPC / serialization cost on its own"""
+    payload = list(range(payload_size))
+    executor, _, _ = make_executor(backend, max_workers)
+    with executor:
+        list(executor.map(noop, range(max_workers)))  # start every worker first
+        start = time.perf_counter()
+        for result in executor.map(echo, [payload] * rounds):
+            assert len(result) == payload_size
+        return (time.perf_counter() - start) / rounds
@@ -0,0 +1,43 @@
+# I/O-bound kernels: the functions pool workers run for the I/O demo.
+# requests is imported inside the HTTP functions, so workers that only run
+# simulate_io_task never load it.
+
+import threading
+import time
+
+def simulate_io_task(num_task):
+    """Simulate I/O with sleep"""
+    time.sleep(0.1)  # Simulate 100ms I/O operation
+    return "✅ Complete"
+
+def fetch_url(url, session=None, timeout=10):
+    """Fetch a URL (I/O-bound task). Without a session every call opens a new connection."""
+    import requests
+
+    try:
+        response = (session or requests).get(url, timeout=timeout)
+        return f"✅ {response.status_code}"
+    except requests.RequestException:
+        return "❌ Failed"
+
+# One requests.Session per thread: a Session keeps connections alive between calls but
+# isn't guaranteed to be thread-safe, so threads don't share one.
+_thread_local = threading.local()
+
+def get_session(pool_size=10):
+    """This thread's pooled requests.Session"""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _thread_local.session = session
+    return session
+
+def fetch_url_pooled(url):
+    """fetch_url through this thread's keep-alive session"""
+    return fetch_url(url, get_session())
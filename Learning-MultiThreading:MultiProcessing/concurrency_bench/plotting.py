@@ -0,0 +1,57 @@
+# Plotting for the benchmark scripts. matplotlib and seaborn are imported here, on the
+# first call, so neither the scripts nor their pool workers pay for them at import time.
+
+_style_ready = False
+
+def _pyplot():
+    """matplotlib.pyplot with the benchmark style applied"""
+    global _style_ready
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if not _style_ready:
+        # Set style for better visualizations
+        plt.style.use('seaborn-v0_8')
+        sns.set_palette("husl")
+        _style_ready = True
+    return plt
+
+def plot_performance(results, title):
+    """Bar charts of execution time and speedup over the first entry of results"""
+    plt = _pyplot()
+    plt.figure(figsize=(12, 5))
+    
+    # Performance comparison
+    plt.subplot(1, 2, 1)
+    methods = list(results.keys())
+    times = list(results.values())
+    colors = ['#ff7f0e', '#2ca02c', '#1f77b4']
+    
+    bars = plt.bar(methods, times, color=colors, alpha=0.7)
+    plt.title(title, fontsize=14, pad=20)
+    plt.ylabel('Execution Time (seconds)')
+    plt.xticks(rotation=45)
+    
+    # Add value labels on bars
+    for bar, time_val in zip(bars, times):
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height + 0.01,
+                f'{time_val:.3f}s', ha='center', va='bottom')
+    
+    # Speedup comparison
+    plt.subplot(1, 2, 2)
+    speedups = [times[0] / t for t in times]
+    bars = plt.bar(methods, speedups, color=colors, alpha=0.7)
+    plt.title('Speedup Factor\n(Higher is Better)', fontsize=14, pad=20)
+    plt.ylabel('Speedup Factor')
+    plt.xticks(rotation=45)
+    plt.axhline(y=1, color='red', linestyle='--', alpha=0.5, label='Baseline')
+    
+    # Add value labels on bars
+    for bar, speedup in zip(bars, speedups):
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height + 0.05,
+                f'{speedup:.2f}x', ha='center', va='bottom')
+    
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,139 @@
+# CPU-bound kernels: everything a pool worker runs for the prime number demo.
+# Kept free of heavy imports so a freshly spawned worker starts quickly; NumPy is only
+# imported (once per process) by the functions of the sieve engine.
+
+import functools
+import math
+import os
+import threading
+import time
+
+
+def is_prime(n):
+    """Check if a number is prime (CPU-intensive task)"""
+    if n < 2:
+        return False
+    for i in range(2, int(n**0.5) + 1):
+        if n % i == 0:
+            return False
+    return True
+
+# ------------------------------------------------------------------------------
+# Segmented Sieve of Eratosthenes engine
+# ------------------------------------------------------------------------------
+# Trial division costs O(sqrt(n)) per number. The sieve crosses out multiples of the
+# primes up to sqrt(end) instead, one fixed-size segment at a time, so the working set
+# (one bool per number in the segment) stays in cache and memory is bounded by the
+# segment size no matter how large the range is.
+
+SEGMENT_SIZE = 1 << 18  # numbers per segment: a 256 KB bool array, fits in L2
+
+@functools.lru_cache(maxsize=8)
+def base_primes(limit):
+    """All primes <= limit with a plain sieve (limit is sqrt(end), so this is small)"""
+    import numpy as np
+
+    sieve = np.ones(limit + 1, dtype=bool)
+    sieve[:2] = False
+    for i in range(2, math.isqrt(limit) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = False
+    return np.flatnonzero(sieve)
+
+def sieve_segment(seg_start, seg_end, limit=None):
+    """Boolean mask of the primes in [seg_start, seg_end): mask[i] is True if seg_start + i is prime.
+    limit is the base-prime bound; pass sqrt of the whole range's end so every segment reuses one table."""
+    import numpy as np
+
+    if limit is None:
+        limit = math.isqrt(max(seg_end - 1, 0))
+    mask = np.ones(seg_end - seg_start, dtype=bool)
+    for p in base_primes(limit).tolist():
+        if p * p >= seg_end:
+            break
+        # First multiple of p inside the segment, but never p itself
+        first = max(p * p, (seg_start + p - 1) // p * p)
+        mask[first - seg_start::p] = False
+    if seg_start < 2:
+        mask[:2 - seg_start] = False  # 0 and 1 are not prime
+    return mask
+
+def segments(start, end, segment_size=SEGMENT_SIZE):
+    """Split [start, end) into consecutive segments"""
+    return [(s, min(s + segment_size, end)) for s in range(start, end, segment_size)]
+
+def sieve_primes(start, end, segment_size=SEGMENT_SIZE):
+    """Primes in [start, end), one segment at a time"""
+    import numpy as np
+
+    limit = math.isqrt(max(end - 1, 0))
+    primes = []
+    for seg_start, seg_end in segments(start, end, segment_size):
+        primes.extend((np.flatnonzero(sieve_segment(seg_start, seg_end, limit)) + seg_start).tolist())
+    return primes
+
+def count_primes_segment(seg_start, seg_end, limit):
+    """Number of primes in one segment (nothing but an int goes back to the parent)"""
+    import numpy as np
+
+    return int(np.count_nonzero(sieve_segment(seg_start, seg_end, limit)))
+
+def trial_division_primes(start, end):
+    """Primes in [start, end) by calling is_prime on every number"""
+    return [n for n in range(start, end) if is_prime(n)]
+
+# Both engines take a range and return the sorted list of primes in it
+ENGINES = {
+    "trial": trial_division_primes,
+    "sieve": sieve_primes,
+}
+
+def primes_in_range(start, end, engine="trial"):
+    """Primes in [start, end) using the chosen engine ('trial' division or segmented 'sieve')"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {sorted(ENGINES)}")
+    return ENGINES[engine](start, end)
+
+def timed_worker(start_chunk, end_chunk, engine="trial"):
+    """Find primes in one chunk (runs in a pool worker) and report how long the computation itself took"""
+    compute_start = time.perf_counter()
+    primes = primes_in_range(start_chunk, end_chunk, engine)
+    return primes, time.perf_counter() - compute_start
+
+def primes_mask(start, end, engine="trial"):
+    """Boolean mask over [start, end) marking the primes"""
+    import numpy as np
+
+    if engine == "sieve":
+        limit = math.isqrt(max(end - 1, 0))
+        parts = [sieve_segment(s, e, limit) for s, e in segments(start, end)]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=bool)
+    mask = np.zeros(end - start, dtype=bool)
+    primes = primes_in_range(start, end, engine)
+    mask[np.asarray(primes, dtype=np.int64) - start] = True
+    return mask
+
+def shm_worker(shm_name, bitmap_bytes, bit_offset, start_chunk, end_chunk, engine="trial"):
+    """Sieve one chunk and write its packed bits into the shared bitmap; returns the compute time"""
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    compute_start = time.perf_counter()
+    packed = np.packbits(primes_mask(start_chunk, end_chunk, engine), bitorder="little")
+    compute_time = time.perf_counter() - compute_start
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        bitmap = np.ndarray((bitmap_bytes,), dtype=np.uint8, buffer=shm.buf)
+        first_byte = bit_offset // 8  # chunks start on byte boundaries, so no two workers share a byte
+        bitmap[first_byte:first_byte + len(packed)] = packed
+        del bitmap  # release the view before closing the mapping
+    finally:
+        shm.close()
+    return compute_time
+
+def scheduled_task(task_start, task_end, engine="trial"):
+    """One task: returns (primes, worker id, start time, end time)"""
+    began = time.monotonic()  # system-wide clock, comparable across processes
+    primes = primes_in_range(task_start, task_end, engine)
+    return primes, (os.getpid(), threading.get_native_id()), began, time.monotonic()
@@ -0,0 +1,161 @@
+# Low-overhead sampling profiler for the benchmarks
+#
+# A separate *process* samples the measured process and all of its children (e.g. the
+# ProcessPoolExecutor workers) through psutil at a fixed rate, so sampling never competes
+# for the GIL of the code being measured. Per process it records CPU time, RSS and context
+# switches, and per thread the CPU time. Samples can be exported together with task start /
+# end events as a Chrome trace (open in chrome://tracing or https://ui.perfetto.dev).
+#
+#   with Sampler(interval=0.02) as sampler:
+#       run_workload()
+#   write_chrome_trace("trace.json", sampler.samples, task_events)
+#
+# Timestamps are time.monotonic(), which is system-wide, so they line up with events
+# recorded in other processes.
+
+import json
+import multiprocessing as mp
+import os
+import time
+
+
+def _sample_loop(root_pid, interval, stop_event, conn):
+    import psutil
+
+    own_pid = os.getpid()
+    root = psutil.Process(root_pid)
+    samples = []
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        try:
+            procs = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            break
+        t = time.monotonic()
+        for proc in procs:
+            if proc.pid == own_pid:
+                continue
+            try:
+                with proc.oneshot():
+                    cpu = proc.cpu_times()
+                    ctx = proc.num_ctx_switches()
+                    samples.append({
+                        "t": t,
+                        "pid": proc.pid,
+                        "cpu_user": cpu.user,
+                        "cpu_system": cpu.system,
+                        "rss": proc.memory_info().rss,
+                        "ctx_voluntary": ctx.voluntary,
+                        "ctx_involuntary": ctx.involuntary,
+                        "threads": {th.id: th.user_time + th.system_time for th in proc.threads()},
+                    })
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue  # worker exited between listing and sampling
+        next_tick += interval
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+    conn.send(samples)
+    conn.close()
+
+
+class Sampler:
+    """Samples pid (default: this process) and its children every `interval` seconds from a
+    separate process. Use as a context manager; samples are in .samples afterwards."""
+
+    def __init__(self, pid=None, interval=0.05):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.samples = []
+        self._ctx = mp.get_context("spawn")  # don't fork a process that may be running threads
+
+    def start(self):
+        self._stop = self._ctx.Event()
+        self._recv, send = self._ctx.Pipe(duplex=False)
+        self._proc = self._ctx.Process(target=_sample_loop, args=(self.pid, self.interval, self._stop, send), daemon=True)
+        self._proc.start()
+        send.close()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.samples = self._recv.recv()  # read before join so a large payload can't block the child
+        self._proc.join()
+        return self.samples
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def cpu_percent(self):
+        """Total CPU % of the process tree between consecutive sampling ticks. Each process
+        contributes its own CPU time since its previous sample, so processes that start or exit
+        in between don't make the total jump (their first and last samples add nothing)."""
+        totals = {s["t"]: 0.0 for s in self.samples}
+        previous = {}
+        for s in self.samples:
+            prev = previous.get(s["pid"])
+            if prev and s["t"] > prev["t"]:
+                cpu = s["cpu_user"] + s["cpu_system"] - prev["cpu_user"] - prev["cpu_system"]
+                totals[s["t"]] += 100 * cpu / (s["t"] - prev["t"])
+            previous[s["pid"]] = s
+        return [totals[t] for t in sorted(totals)[1:]]
+
+
+def summarize(samples):
+    """Per process: CPU seconds used, average CPU %, peak RSS, context switches, and per
+    thread the off-CPU time (alive but not running). That includes blocking on I/O, locks and
+    an idle pool worker waiting on its task queue, so it is only an upper bound on GIL wait,
+    and a tight one only for threads that never block."""
+    by_pid = {}
+    for s in samples:
+        by_pid.setdefault(s["pid"], []).append(s)
+    summary = {}
+    for pid, series in by_pid.items():
+        first, last = series[0], series[-1]
+        span = last["t"] - first["t"]
+        cpu = (last["cpu_user"] + last["cpu_system"]) - (first["cpu_user"] + first["cpu_system"])
+        threads = {}
+        for tid, cpu_end in last["threads"].items():
+            cpu_start = next((s["threads"][tid] for s in series if tid in s["threads"]), cpu_end)
+            seen = [s["t"] for s in series if tid in s["threads"]]
+            alive = seen[-1] - seen[0]
+            threads[tid] = {"cpu_s": cpu_end - cpu_start, "off_cpu_s": max(0.0, alive - (cpu_end - cpu_start))}
+        summary[pid] = {
+            "cpu_s": cpu,
+            "avg_cpu_percent": 100 * cpu / span if span else 0.0,
+            "peak_rss_mb": max(s["rss"] for s in series) / 2**20,
+            "ctx_voluntary": last["ctx_voluntary"] - first["ctx_voluntary"],
+            "ctx_involuntary": last["ctx_involuntary"] - first["ctx_involuntary"],
+            "threads": threads,
+        }
+    return summary
+
+
+def write_chrome_trace(path, samples, task_events=()):
+    """Write samples as counter tracks and task_events ({name, pid, tid, start, end} in
+    time.monotonic() seconds) as slices, in Chrome trace event JSON format"""
+    times = [s["t"] for s in samples] + [e["start"] for e in task_events]
+    origin = min(times) if times else 0.0
+    us = lambda t: (t - origin) * 1e6
+    events = []
+
+    previous = {}
+    for s in samples:
+        pid = s["pid"]
+        events.append({"name": "rss (MB)", "ph": "C", "pid": pid, "ts": us(s["t"]), "args": {"rss": s["rss"] / 2**20}})
+        prev = previous.get(pid)
+        if prev and s["t"] > prev["t"]:
+            dt = s["t"] - prev["t"]
+            cpu = (s["cpu_user"] + s["cpu_system"] - prev["cpu_user"] - prev["cpu_system"]) / dt
+            ctx = (s["ctx_voluntary"] + s["ctx_involuntary"] - prev["ctx_voluntary"] - prev["ctx_involuntary"]) / dt
+            events.append({"name": "cpu %", "ph": "C", "pid": pid, "ts": us(s["t"]), "args": {"cpu": 100 * cpu}})
+            events.append({"name": "context switches/s", "ph": "C", "pid": pid, "ts": us(s["t"]), "args": {"ctx": ctx}})
+        previous[pid] = s
+
+    for e in task_events:
+        events.append({"name": e["name"], "ph": "X", "pid": e["pid"], "tid": e["tid"],
+                       "ts": us(e["start"]), "dur": (e["end"] - e["start"]) * 1e6})
+
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
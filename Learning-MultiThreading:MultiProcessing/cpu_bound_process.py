@@ -1,83 +1,68 @@
 # Multiprocessing vs Multithreading: Interactive Guide
 # A comprehensive educational notebook to understand when and how to use multiprocessing vs multithreading
 
+import os
 import time
+import math
+import argparse
 import threading
-import multiprocessing as mp
 import concurrent.futures
-import requests
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.animation import FuncAnimation
-import psutil
+import pickle
+from multiprocessing import shared_memory
 import queue
-from threading import Lock
-from datetime import datetime
+# Pool workers only import concurrency_bench.primes (where the functions they run live);
+# NumPy, psutil and matplotlib are imported by the functions that need them.
+from concurrency_bench import executors, plotting, profiler
+from concurrency_bench.primes import (ENGINES, count_primes_segment, primes_in_range, scheduled_task,
+                                      segments, shm_worker, timed_worker)
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style for better visualizations
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
-
-print("🚀 Multiprocessing vs Multithreading Interactive Guide")
-print("=" * 60)
-
 # ==============================================================================
 # SECTION 2: VISUAL DEMONSTRATIONS
 # ==============================================================================
 
-print("\n\n🎬 SECTION 2: VISUAL DEMONSTRATIONS")
-print("-" * 40)
-
 # Utility functions for monitoring
 def get_cpu_usage():
     """Get current CPU usage"""
+    import psutil
+
     return psutil.cpu_percent(interval=0.1)
 
-def monitor_performance(func, duration=5):
-    """Monitor CPU usage during function execution"""
-    cpu_usage = []
-    start_time = time.time()
-    
-    def monitor():
-        while time.time() - start_time < duration:
-            cpu_usage.append(psutil.cpu_percent(interval=0.1))
-            time.sleep(0.1)
-    
-    monitor_thread = threading.Thread(target=monitor)
-    monitor_thread.daemon = True
-    monitor_thread.start()
-    
-    result = func()
-    
-    monitor_thread.join(timeout=1)
-    return result, cpu_usage
+def monitor_performance(func, duration=5, interval=0.1):
+    """Monitor CPU usage of this process and its workers during function execution.
+    Sampling happens in a separate process (see profiler.py), not in a thread competing
+    for the GIL; returns (result, CPU % of the process tree per sampling interval),
+    covering the first `duration` seconds of the run as before."""
+    with profiler.Sampler(interval=interval) as sampler:
+        result = func()
+    return result, sampler.cpu_percent()[:round(duration / interval)]
 
 # ==============================================================================
 # DEMO A: CPU-BOUND TASK COMPARISON
 # ==============================================================================
 
-print("\n🔢 DEMO A: CPU-BOUND TASKS (Prime Number Calculation)")
-
-def is_prime(n):
-    """Check if a number is prime (CPU-intensive task)"""
-    if n < 2:
-        return False
-    for i in range(2, int(n**0.5) + 1):
-        if n % i == 0:
-            return False
-    return True
+def count_primes_multiprocessing(start, end, num_processes=4, segment_size=1 << 20):
+    """Count primes in [start, end) by spreading the segments over a process pool.
+    Memory per worker is bounded by segment_size, so ranges up to 10**10 are fine."""
+    bounds = segments(start, end, segment_size)
+    if not bounds:
+        return 0
+    seg_starts, seg_ends = zip(*bounds)
+    limits = [math.isqrt(max(end - 1, 0))] * len(bounds)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
+        counts = executor.map(count_primes_segment, seg_starts, seg_ends, limits,
+                              chunksize=max(1, len(bounds) // (num_processes * 8)))
+        return sum(counts)
 
-def find_primes_sequential(start, end):
+def find_primes_sequential(start, end, engine="trial"):
     """Find primes sequentially"""
-    return [n for n in range(start, end) if is_prime(n)]
+    return primes_in_range(start, end, engine)
 
-def find_primes_threading(start, end, num_threads=4):
+def find_primes_threading(start, end, num_threads=4, engine="trial"):
     """Find primes using multithreading"""
     def worker(start_chunk, end_chunk, result_queue):
-        primes = [n for n in range(start_chunk, end_chunk) if is_prime(n)]
+        primes = primes_in_range(start_chunk, end_chunk, engine)
         result_queue.put(primes)
     
     chunk_size = (end - start) // num_threads
@@ -102,10 +87,17 @@ def find_primes_threading(start, end, num_threads=4):
     return sorted(all_primes)
 
 # """Find primes using multiprocessing"""
-def worker(start_chunk, end_chunk):
-    return [n for n in range(start_chunk, end_chunk) if is_prime(n)]
+def find_primes_multiprocessing(start, end, num_processes=4, engine="trial", transport="pickle", stats=None):
+    """Find primes using multiprocessing.
+    transport='pickle' sends each chunk's list of primes back through the executor;
+    transport='shared_memory' has workers fill one shared bitmap instead (see below).
+    If a dict is passed as stats, it is filled with timing / bytes-transferred numbers."""
+    if transport == "shared_memory":
+        return find_primes_multiprocessing_shm(start, end, num_processes, engine, stats)
+    if transport != "pickle":
+        raise ValueError(f"Unknown transport {transport!r}, expected 'pickle' or 'shared_memory'")
 
-def find_primes_multiprocessing(start, end, num_processes=4):
+    total_start = time.perf_counter()
     chunk_size = (end - start) // num_processes
     
     with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
@@ -115,18 +107,200 @@ def find_primes_multiprocessing(start, end, num_processes=4):
             start_chunk = start + i * chunk_size
             end_chunk = start + (i + 1) * chunk_size if i < num_processes - 1 else end
             
-            future = executor.submit(worker, start_chunk, end_chunk)
+            future = executor.submit(timed_worker, start_chunk, end_chunk, engine)
             futures.append(future)
         
-        all_primes = []
+        chunk_results, compute_times = [], []
         for future in concurrent.futures.as_completed(futures):
-            all_primes.extend(future.result())
-    
-    return sorted(all_primes)
+            primes, compute_time = future.result()
+            chunk_results.append(primes)
+            compute_times.append(compute_time)
+
+    merge_start = time.perf_counter()
+    all_primes = []
+    for primes in chunk_results:
+        all_primes.extend(primes)
+    all_primes.sort()
+    merge_time = time.perf_counter() - merge_start
+
+    if stats is not None:
+        total = time.perf_counter() - total_start
+        stats.update(
+            transport="pickle",
+            total_s=total,
+            compute_s=max(compute_times),
+            ipc_s=total - max(compute_times) - merge_time,  # pool startup + pickling + transfer
+            merge_s=merge_time,
+            ipc_bytes=sum(len(pickle.dumps(primes)) for primes in chunk_results),
+        )
+    return all_primes
+
+# ------------------------------------------------------------------------------
+# Shared-memory result transport
+# ------------------------------------------------------------------------------
+# Every worker owns a fixed slice of one shared bitmap (bit i set <=> start + i is prime)
+# and writes its chunk there; only the chunk bounds and a float go through pickling.
+# The parent reads the bitmap in place, and since the bits are in number order the
+# result comes out sorted without a global sort.
+
+def find_primes_multiprocessing_shm(start, end, num_processes=4, engine="trial", stats=None):
+    """Find primes using multiprocessing, with results returned through a shared-memory bitmap"""
+    import numpy as np
 
-def compare_cpu_bound_performance():
+    total_start = time.perf_counter()
+    n = max(end - start, 0)
+    bitmap_bytes = (n + 7) // 8
+    # Round chunks up to a multiple of 8 numbers so each one fills whole bytes of the bitmap
+    chunk_size = -(-max(n // num_processes, 1) // 8) * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(bitmap_bytes, 1))
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
+            futures = [
+                executor.submit(shm_worker, shm.name, bitmap_bytes, offset,
+                                start + offset, min(start + offset + chunk_size, end), engine)
+                for offset in range(0, n, chunk_size)
+            ]
+            compute_times = [future.result() for future in futures]
+
+        read_start = time.perf_counter()
+        bitmap = np.ndarray((bitmap_bytes,), dtype=np.uint8, buffer=shm.buf)
+        bits = np.unpackbits(bitmap, count=n, bitorder="little")
+        del bitmap
+        all_primes = (np.flatnonzero(bits) + start).tolist()
+        read_time = time.perf_counter() - read_start
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if stats is not None:
+        total = time.perf_counter() - total_start
+        max_compute = max(compute_times, default=0.0)
+        stats.update(
+            transport="shared_memory",
+            total_s=total,
+            compute_s=max_compute,
+            ipc_s=total - max_compute - read_time,  # pool startup + task / float pickling
+            merge_s=read_time,
+            ipc_bytes=bitmap_bytes,
+        )
+    return all_primes
+
+def compare_result_transport(engine="trial", start_range=1, end_range=5000000, num_processes=4):
+    """Compare pickled lists against the shared-memory bitmap for returning worker results"""
+    print(f"\n📦 Result transport ({engine} engine, primes from {start_range} to {end_range}, {num_processes} processes):")
+    results = {}
+    for transport in ["pickle", "shared_memory"]:
+        stats = {}
+        results[transport] = find_primes_multiprocessing(start_range, end_range, num_processes, engine, transport, stats)
+        print(f"  {transport:14}: total {stats['total_s']:.3f}s | compute {stats['compute_s']:.3f}s"
+              f" | IPC {stats['ipc_s']:.3f}s | merge/read {stats['merge_s']:.3f}s"
+              f" | {stats['ipc_bytes'] / 2**20:.2f} MB transferred")
+    assert results["pickle"] == results["shared_memory"], "Results don't match!"
+    return results
+
+# ------------------------------------------------------------------------------
+# Dynamic scheduling
+# ------------------------------------------------------------------------------
+# The functions above hand every worker one equal slice of [start, end). With trial
+# division a number near `end` costs far more than one near `start`, so the last slice
+# finishes long after the others and those cores sit idle. Here the range is cut into
+# many small tasks of roughly equal *cost*, and the pool's shared task queue hands
+# them out as workers become free.
+
+def default_worker_count():
+    """CPUs this process may run on (falls back to os.cpu_count())"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def split_by_cost(start, end, num_tasks, engine="trial"):
+    """Cut [start, end) into num_tasks ranges of about equal work.
+    Trial division of n costs ~sqrt(n), so boundaries are spaced evenly in n**1.5
+    (the integral of sqrt); the sieve (or engine=None) gets equal sizes."""
+    if engine == "trial":
+        lo, hi = start ** 1.5, end ** 1.5
+        cuts = [int(round((lo + (hi - lo) * i / num_tasks) ** (2 / 3))) for i in range(num_tasks + 1)]
+    else:
+        cuts = [start + (end - start) * i // num_tasks for i in range(num_tasks + 1)]
+    cuts[0], cuts[-1] = start, end
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if a < b]
+
+def find_primes_dynamic(start, end, num_workers=None, engine="trial", backend="process",
+                        tasks_per_worker=16, weighted=True, report=None):
+    """Find primes with many small tasks pulled from a shared queue.
+    num_workers defaults to the number of usable CPUs. backend is one of executors.BACKENDS
+    ('thread', 'process', 'free-threaded', 'subinterpreter'); unavailable ones fall back.
+    With tasks_per_worker=1 and weighted=False this is the old static split. If a dict is
+    passed as report, it receives the wall time and per-worker busy/idle time."""
+    num_workers = num_workers or default_worker_count()
+    tasks = split_by_cost(start, end, num_workers * tasks_per_worker, engine if weighted else None)
+
+    wall_start = time.monotonic()
+    executor, resolved, note = executors.make_executor(backend, num_workers)
+    with executor:
+        # Tasks are queued in order and finished ones are read back in the same order,
+        # so the result is already sorted
+        results = list(executor.map(scheduled_task, *zip(*tasks), [engine] * len(tasks)))
+    wall = time.monotonic() - wall_start
+
+    if report is not None:
+        busy = {}
+        for _, worker_id, began, finished in results:
+            busy[worker_id] = busy.get(worker_id, 0.0) + (finished - began)
+        report.update(
+            backend=resolved,
+            fallback_note=note,
+            wall_s=wall,
+            tasks=len(tasks),
+            workers={f"pid {pid}" if resolved == "process" else f"thread {tid}": {"busy_s": b, "idle_s": wall - b}
+                     for (pid, tid), b in busy.items()},
+            # Task start / end events for profiler.write_chrome_trace
+            events=[{"name": f"primes [{a}, {b})", "pid": pid, "tid": tid, "start": began, "end": finished}
+                    for (a, b), (_, (pid, tid), began, finished) in zip(tasks, results)],
+        )
+    all_primes = []
+    for primes, _, _, _ in results:
+        all_primes.extend(primes)
+    return all_primes
+
+def compare_scheduling(engine="trial", start_range=1, end_range=5000000, num_workers=None):
+    """Static equal slices vs cost-weighted dynamic tasks, with per-worker utilization"""
+    num_workers = num_workers or default_worker_count()
+    print(f"\n🗂️  Scheduling ({engine} engine, primes from {start_range} to {end_range}, {num_workers} processes):")
+    results = {}
+    for name, kwargs in [("Static", dict(tasks_per_worker=1, weighted=False)),
+                         ("Dynamic", dict(tasks_per_worker=16, weighted=True))]:
+        report = {}
+        results[name] = find_primes_dynamic(start_range, end_range, num_workers, engine, report=report, **kwargs)
+        busy = [w["busy_s"] for w in report["workers"].values()]
+        utilization = sum(busy) / (report["wall_s"] * num_workers)
+        print(f"  {name:8}: {report['wall_s']:.3f}s, {report['tasks']} tasks, utilization {utilization:.0%}")
+        for worker_id, w in sorted(report["workers"].items()):
+            print(f"      {worker_id:>12}: busy {w['busy_s']:.3f}s, idle {w['idle_s']:.3f}s")
+    assert results["Static"] == results["Dynamic"], "Results don't match!"
+    return results
+
+def trace_primes(path, engine="trial", start_range=1, end_range=5000000, num_workers=None,
+                 backend="process", interval=0.02):
+    """Run find_primes_dynamic under the sampling profiler and write a Chrome trace with
+    CPU / RSS / context-switch tracks per process and one slice per task"""
+    report = {}
+    with profiler.Sampler(interval=interval) as sampler:
+        find_primes_dynamic(start_range, end_range, num_workers, engine, backend, report=report)
+    profiler.write_chrome_trace(path, sampler.samples, report["events"])
+
+    print(f"\n🔬 Profile ({report['backend']}, {report['tasks']} tasks, {report['wall_s']:.3f}s) -> {path}")
+    for pid, p in sorted(profiler.summarize(sampler.samples).items()):
+        off_cpu = sum(t["off_cpu_s"] for t in p["threads"].values())
+        print(f"  pid {pid}: cpu {p['cpu_s']:.2f}s ({p['avg_cpu_percent']:.0f}%), peak RSS {p['peak_rss_mb']:.0f} MB,"
+              f" ctx switches {p['ctx_voluntary']}/{p['ctx_involuntary']} (vol/invol),"
+              f" thread off-CPU {off_cpu:.2f}s (upper bound on GIL wait)")
+    return report
+
+def compare_cpu_bound_performance(engine="trial"):
     """Compare performance of different approaches for CPU-bound tasks"""
-    print("\n⏱️  Performance Comparison (Finding primes from 1 to 5000000):")
+    print(f"\n⏱️  Performance Comparison (Finding primes from 1 to 5000000, {engine} engine):")
     
     start_range, end_range = 1, 5000000
     results = {}
@@ -134,21 +308,21 @@ def compare_cpu_bound_performance():
     # Sequential
     print("  🐌 Sequential processing...")
     start_time = time.time()
-    seq_primes = find_primes_sequential(start_range, end_range)
+    seq_primes = find_primes_sequential(start_range, end_range, engine)
     seq_time = time.time() - start_time
     results['Sequential'] = seq_time
     
     # Threading
     print("  🧵 Multithreading (4 threads)...")
     start_time = time.time()
-    thread_primes = find_primes_threading(start_range, end_range, 4)
+    thread_primes = find_primes_threading(start_range, end_range, 4, engine)
     thread_time = time.time() - start_time
     results['Threading'] = thread_time
     
     # Multiprocessing
     print("  🔄 Multiprocessing (4 processes)...")
     start_time = time.time()
-    mp_primes = find_primes_multiprocessing(start_range, end_range, 4)
+    mp_primes = find_primes_multiprocessing(start_range, end_range, 4, engine)
     mp_time = time.time() - start_time
     results['Multiprocessing'] = mp_time
     
@@ -163,46 +337,10 @@ def compare_cpu_bound_performance():
     
     return results
 
-def visualize_cpu_performance():
+def visualize_cpu_performance(engine="trial"):
     """Create visualization of CPU-bound performance"""
-    results = compare_cpu_bound_performance()
-    
-    plt.figure(figsize=(12, 5))
-    
-    # Performance comparison
-    plt.subplot(1, 2, 1)
-    methods = list(results.keys())
-    times = list(results.values())
-    colors = ['#ff7f0e', '#2ca02c', '#1f77b4']
-    
-    bars = plt.bar(methods, times, color=colors, alpha=0.7)
-    plt.title('CPU-Bound Task Performance\n(Prime Number Calculation)', fontsize=14, pad=20)
-    plt.ylabel('Execution Time (seconds)')
-    plt.xticks(rotation=45)
-    
-    # Add value labels on bars
-    for bar, time_val in zip(bars, times):
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height + 0.01,
-                f'{time_val:.3f}s', ha='center', va='bottom')
-    
-    # Speedup comparison
-    plt.subplot(1, 2, 2)
-    speedups = [times[0] / t for t in times]
-    bars = plt.bar(methods, speedups, color=colors, alpha=0.7)
-    plt.title('Speedup Factor\n(Higher is Better)', fontsize=14, pad=20)
-    plt.ylabel('Speedup Factor')
-    plt.xticks(rotation=45)
-    plt.axhline(y=1, color='red', linestyle='--', alpha=0.5, label='Baseline')
-    
-    # Add value labels on bars
-    for bar, speedup in zip(bars, speedups):
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                f'{speedup:.2f}x', ha='center', va='bottom')
-    
-    plt.tight_layout()
-    plt.show()
+    results = compare_cpu_bound_performance(engine)
+    plotting.plot_performance(results, 'CPU-Bound Task Performance\n(Prime Number Calculation)')
     
     print("\n💡 Key Insights:")
     print("  • Threading shows minimal improvement due to Python's GIL")
@@ -211,4 +349,35 @@ def visualize_cpu_performance():
 
 # Run CPU-bound demonstration
 if __name__ == "__main__":          # <---- guard here
-    visualize_cpu_performance()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="CPU-bound prime benchmark")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="trial",
+                        help="'trial' division (default) or segmented 'sieve'")
+    parser.add_argument("--transport-report", action="store_true",
+                        help="compare pickled result lists with the shared-memory bitmap transport")
+    parser.add_argument("--schedule-report", action="store_true",
+                        help="compare static equal chunks with the dynamic cost-weighted scheduler")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="profile the dynamic scheduler and write a Chrome trace JSON to PATH")
+    parser.add_argument("--backend", choices=executors.BACKENDS, default="process",
+                        help="executor backend for --trace")
+    parser.add_argument("--count-up-to", type=int, metavar="N",
+                        help="only count primes below N with the sieve over a process pool (e.g. 10**10)")
+    args = parser.parse_args()
+
+    if args.transport_report:
+        compare_result_transport(args.engine)
+    elif args.schedule_report:
+        compare_scheduling(args.engine)
+    elif args.trace:
+        trace_primes(args.trace, args.engine, backend=args.backend)
+    elif args.count_up_to:
+        start_time = time.time()
+        count = count_primes_multiprocessing(1, args.count_up_to, default_worker_count())
+        print(f"{count} primes below {args.count_up_to} ({time.time() - start_time:.2f}s)")
+    else:
+        print("🚀 Multiprocessing vs Multithreading Interactive Guide")
+        print("=" * 60)
+        print("\n\n🎬 SECTION 2: VISUAL DEMONSTRATIONS")
+        print("-" * 40)
+        print("\n🔢 DEMO A: CPU-BOUND TASKS (Prime Number Calculation)")
+        visualize_cpu_performance(args.engine)
\ No newline at end of file
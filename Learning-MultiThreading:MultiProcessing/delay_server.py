@@ -0,0 +1,75 @@
+# Minimal local stand-in for httpbin.org/delay/<seconds>, so the I/O benchmark runs offline.
+# Built on asyncio streams: one coroutine per connection, HTTP/1.1 keep-alive, thousands of
+# concurrent connections on a single thread.
+#
+#   python delay_server.py --port 8080      # then GET http://127.0.0.1:8080/delay/0.5
+
+import argparse
+import asyncio
+import re
+import subprocess
+import sys
+
+MAX_DELAY = 10.0
+
+async def handle_connection(reader, writer):
+    """Serve requests on one connection until the client closes it"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = True
+            while True:  # headers; GET only, so there is no body to read
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                if line.lower().startswith(b"connection:") and b"close" in line.lower():
+                    keep_alive = False
+
+            parts = request_line.decode("latin-1").split()
+            match = re.fullmatch(r"/delay/(\d+(?:\.\d+)?)", parts[1] if len(parts) > 1 else "")
+            if match:
+                await asyncio.sleep(min(float(match.group(1)), MAX_DELAY))
+                status, body = b"200 OK", b'{"delayed": true}'
+            else:
+                status, body = b"404 Not Found", b'{"error": "use /delay/<seconds>"}'
+
+            writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                         b"Connection: " + (b"keep-alive" if keep_alive else b"close") + b"\r\n\r\n" + body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(host="127.0.0.1", port=0):
+    server = await asyncio.start_server(handle_connection, host, port, backlog=4096)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def start_server_process(host="127.0.0.1"):
+    """Start the server in a child process (so it doesn't share the GIL with the clients
+    being measured). Returns (process, base_url); call process.terminate() when done."""
+    process = subprocess.Popen([sys.executable, __file__, "--host", host, "--port", "0"],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.terminate()
+        raise RuntimeError(f"delay server failed to start: {line!r}")
+    return process, line.split()[-1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local /delay/<seconds> HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
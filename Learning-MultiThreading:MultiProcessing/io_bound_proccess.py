@@ -2,43 +2,21 @@
 # A comprehensive educational notebook to understand when and how to use multiprocessing vs multithreading
 
 import time
-import threading
-import multiprocessing as mp
+import asyncio
+import argparse
 import concurrent.futures
-import requests
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.animation import FuncAnimation
-import psutil
-import queue
-from threading import Lock
-from datetime import datetime
+# Pool workers only import concurrency_bench.io_tasks (where the functions they run live);
+# requests and matplotlib are imported by the functions that need them.
+from concurrency_bench import plotting
+from concurrency_bench.io_tasks import fetch_url, fetch_url_pooled, simulate_io_task
+import delay_server
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style for better visualizations
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
-
-print("🚀 Multiprocessing vs Multithreading Interactive Guide")
-print("=" * 60)
-
 # ==============================================================================
 # DEMO B: I/O-BOUND TASK COMPARISON
 # ==============================================================================
 
-print("\n\n🌐 DEMO B: I/O-BOUND TASKS (Web Requests)")
-
-def fetch_url(url):
-    """Simulate fetching a URL (I/O-bound task)"""
-    try:
-        # Using httpbin for testing - it provides various endpoints for testing
-        response = requests.get(f"https://httpbin.org/delay/{np.random.randint(1, 3)}", timeout=10)
-        return f"✅ {response.status_code}"
-    except:
-        return "❌ Failed"
-
 def fetch_urls_sequential(urls):
     """Fetch URLs sequentially"""
     results = []
@@ -46,10 +24,10 @@ def fetch_urls_sequential(urls):
         results.append(fetch_url(url))
     return results
 
-def fetch_urls_threading(urls, num_threads=4):
-    """Fetch URLs using multithreading"""
+def fetch_urls_threading(urls, num_threads=4, pooled=False):
+    """Fetch URLs using multithreading; pooled=True reuses one keep-alive session per thread"""
     with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
-        results = list(executor.map(fetch_url, urls))
+        results = list(executor.map(fetch_url_pooled if pooled else fetch_url, urls))
     return results
 
 def fetch_urls_multiprocessing(urls, num_processes=4):
@@ -58,6 +36,57 @@ def fetch_urls_multiprocessing(urls, num_processes=4):
         results = list(executor.map(fetch_url, urls))
     return results
 
+async def fetch_urls_async(urls, concurrency=100, timeout=10):
+    """Fetch URLs with asyncio: one aiohttp session (keep-alive connection pool) shared by all
+    requests, at most `concurrency` in flight at once, and a timeout per request"""
+    try:
+        import aiohttp  # only needed for the asyncio path
+    except ImportError as exc:
+        raise ImportError("The asyncio mode needs aiohttp: pip install aiohttp") from exc
+
+    semaphore = asyncio.Semaphore(concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def fetch(session, url):
+        async with semaphore:
+            try:
+                async with session.get(url, timeout=client_timeout) as response:
+                    await response.read()
+                    return f"✅ {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return "❌ Failed"
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(*(fetch(session, url) for url in urls))
+
+def fetch_urls_asyncio(urls, concurrency=100, timeout=10):
+    """Synchronous wrapper around fetch_urls_async"""
+    return asyncio.run(fetch_urls_async(urls, concurrency, timeout))
+
+def compare_http_clients(num_requests=2000, delay=0.1, num_threads=64, concurrency=500):
+    """Benchmark the HTTP client paths against the bundled local delay server (no network needed)"""
+    print(f"\n⏱️  HTTP clients against the local delay server ({num_requests} requests, {delay}s delay each):")
+    server, base_url = delay_server.start_server_process()
+    urls = [f"{base_url}/delay/{delay}" for _ in range(num_requests)]
+    results = {}
+    try:
+        runs = [
+            (f"Threads ({num_threads}), new connection each", lambda: fetch_urls_threading(urls, num_threads)),
+            (f"Threads ({num_threads}), pooled sessions", lambda: fetch_urls_threading(urls, num_threads, pooled=True)),
+            (f"asyncio ({concurrency} in flight), pooled", lambda: fetch_urls_asyncio(urls, concurrency)),
+        ]
+        for name, run in runs:
+            start_time = time.time()
+            responses = run()
+            elapsed = time.time() - start_time
+            failed = sum(not r.startswith("✅") for r in responses)
+            results[name] = elapsed
+            print(f"  {name:45}: {elapsed:.3f}s ({num_requests / elapsed:.0f} req/s, {failed} failed)")
+    finally:
+        server.terminate()
+    return results
+
 def compare_io_bound_performance():
     """Compare performance of different approaches for I/O-bound tasks"""
     print("\n⏱️  Performance Comparison (10 HTTP requests with random delays):")
@@ -94,11 +123,6 @@ def compare_io_bound_performance():
     
     return results
 
-def simulate_io_task(num_task):
-    """Simulate I/O with sleep"""
-    time.sleep(0.1)  # Simulate 100ms I/O operation
-    return "✅ Complete"
-
 def simulate_io_comparison():
     """Simulate I/O comparison with local operations to avoid network dependency"""
     print("\n⏱️  Performance Comparison (Simulated I/O operations):")
@@ -136,43 +160,7 @@ def visualize_io_performance():
     """Create visualization of I/O-bound performance"""
     results = simulate_io_comparison()
     print(results)
-    
-    plt.figure(figsize=(12, 5))
-    
-    # Performance comparison
-    plt.subplot(1, 2, 1)
-    methods = list(results.keys())
-    times = list(results.values())
-    colors = ['#ff7f0e', '#2ca02c', '#1f77b4']
-    
-    bars = plt.bar(methods, times, color=colors, alpha=0.7)
-    plt.title('I/O-Bound Task Performance\n(Simulated Network Requests)', fontsize=14, pad=20)
-    plt.ylabel('Execution Time (seconds)')
-    plt.xticks(rotation=45)
-    
-    # Add value labels on bars
-    for bar, time_val in zip(bars, times):
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height + 0.01,
-                f'{time_val:.3f}s', ha='center', va='bottom')
-    
-    # Speedup comparison
-    plt.subplot(1, 2, 2)
-    speedups = [times[0] / t for t in times]
-    bars = plt.bar(methods, speedups, color=colors, alpha=0.7)
-    plt.title('Speedup Factor\n(Higher is Better)', fontsize=14, pad=20)
-    plt.ylabel('Speedup Factor')
-    plt.xticks(rotation=45)
-    plt.axhline(y=1, color='red', linestyle='--', alpha=0.5, label='Baseline')
-    
-    # Add value labels on bars
-    for bar, speedup in zip(bars, speedups):
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                f'{speedup:.2f}x', ha='center', va='bottom')
-    
-    plt.tight_layout()
-    plt.show()
+    plotting.plot_performance(results, 'I/O-Bound Task Performance\n(Simulated Network Requests)')
     
     print("\n💡 Key Insights:")
     print("  • Threading excels at I/O-bound tasks (no GIL limitation during I/O)")
@@ -181,4 +169,17 @@ def visualize_io_performance():
 
 # Run I/O-bound demonstration   
 if __name__ == "__main__":          # <---- guard here
-    visualize_io_performance()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="I/O-bound benchmark")
+    parser.add_argument("--http", action="store_true",
+                        help="benchmark threaded, pooled and asyncio HTTP clients against the local delay server")
+    parser.add_argument("--requests", type=int, default=2000, help="number of HTTP requests for --http")
+    parser.add_argument("--concurrency", type=int, default=500, help="max in-flight asyncio requests for --http")
+    args = parser.parse_args()
+
+    if args.http:
+        compare_http_clients(args.requests, concurrency=args.concurrency)
+    else:
+        print("🚀 Multiprocessing vs Multithreading Interactive Guide")
+        print("=" * 60)
+        print("\n\n🌐 DEMO B: I/O-BOUND TASKS (Web Requests)")
+        visualize_io_performance()
\ No newline at end of file
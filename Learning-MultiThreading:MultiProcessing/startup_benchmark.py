@@ -0,0 +1,111 @@
+# How much of a run goes into importing things. Before the concurrency_bench split, the
+# scripts imported requests, NumPy, matplotlib, seaborn and psutil at the top, and every
+# spawned pool worker re-imports the main script, so each worker paid for all of them.
+# This prints the `python -X importtime` breakdown and the cost of starting one spawned
+# worker, for the old set of top-level imports and for what the scripts import now.
+#
+#   python startup_benchmark.py
+#   python startup_benchmark.py --repeats 20 --top 15
+
+import argparse
+import importlib
+import importlib.util
+import multiprocessing as mp
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Top-level imports of cpu_bound_process.py / io_bound_proccess.py before the split
+BEFORE = ["requests", "numpy", "matplotlib.pyplot", "seaborn", "matplotlib.animation", "psutil"]
+# What a worker imports now: the scripts themselves are light, and the functions the pool
+# runs live in concurrency_bench.primes / concurrency_bench.io_tasks
+AFTER = ["cpu_bound_process", "io_bound_proccess"]
+
+
+def available(modules):
+    """The modules that can be imported here (split into found, missing)"""
+    found, missing = [], []
+    for name in modules:
+        try:
+            ok = importlib.util.find_spec(name) is not None
+        except ModuleNotFoundError:  # parent package missing
+            ok = False
+        (found if ok else missing).append(name)
+    return found, missing
+
+
+def import_times(modules):
+    """Run `python -X importtime` on the modules; returns (total_s, {top-level module: cumulative_s})"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    per_module = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # indented names were imported by another module
+            per_module[name.strip()] = int(cumulative) / 1e6
+    return sum(per_module.values()), per_module
+
+
+def load(modules):
+    """Spawned worker body: import the modules and exit"""
+    for name in modules:
+        importlib.import_module(name)
+
+
+def spawn_cost(modules, repeats):
+    """Median seconds to start a spawned worker that imports the modules, until it exits"""
+    ctx = mp.get_context("spawn")
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        proc = ctx.Process(target=load, args=(modules,))
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            raise RuntimeError(f"worker importing {modules} exited with {proc.exitcode}")
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and spawned-worker startup, before vs after lazy imports")
+    parser.add_argument("--repeats", type=int, default=10, help="spawned workers timed per configuration")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}, start method for workers: spawn\n")
+    results = {}
+    for label, modules in [("before", BEFORE), ("after", AFTER)]:
+        found, missing = available(modules)
+        if not found:
+            print(f"⏱️  {label}: none of {', '.join(modules)} installed, skipped\n")
+            continue
+        total, per_module = import_times(found)
+        worker = spawn_cost(found, args.repeats)
+        results[label] = (total, worker)
+
+        print(f"⏱️  {label}: import {', '.join(found)}")
+        if missing:
+            print(f"   (not installed, left out: {', '.join(missing)})")
+        print(f"   import time {total * 1000:.1f}ms, spawned worker startup {worker * 1000:.1f}ms (median of {args.repeats})")
+        for name, seconds in sorted(per_module.items(), key=lambda kv: -kv[1])[: args.top]:
+            print(f"      {name:35} {seconds * 1000:8.1f}ms")
+        print()
+
+    if len(results) < 2:
+        return
+    (before_import, before_worker), (after_import, after_worker) = results["before"], results["after"]
+    print(f"📊 Per worker: {before_worker * 1000:.1f}ms -> {after_worker * 1000:.1f}ms"
+          f" ({before_worker - after_worker:.3f}s saved per spawned process)")
+    print(f"   Imports:    {before_import * 1000:.1f}ms -> {after_import * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()